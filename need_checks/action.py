@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from asyncio import sleep
 from base64 import b64decode
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
-from time import sleep
-from typing import cast
+from http import HTTPStatus
+from http.client import HTTPException
+from pathlib import Path
+from time import time
+from typing import Any
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 import click
-import strictyaml as yaml
-from fastcore.net import HTTP404NotFoundError
-from ghapi.all import GhApi
 
-from . import errors, ui
-from .context import Context
-from .types import CheckRun, CheckRunList, GitRef, Job, WorkflowRun
+from . import errors, filters, graphql, records, scheduler, statuses, ui, webhook
+from . import workflow as workflows
+from .cache import DiskCache, digest
+from .client import GitHub, links
+from .context import Context, Target
+from .types import CheckRun, GitRef, Job
+
+PER_PAGE = 100  # Maximum page size allowed by the GitHub API
+MAX_CHECK_NAME_QUERIES = 5  # Past this many included names, a single listing is cheaper
+QUALIFIED_REFS = ("heads/", "tags/", "pull/")
+DELEGATE_TIMEOUT_MARGIN = 60  # Extra seconds given to the server to answer past the wait timeout
 
 
 class Conclusion(Enum):
@@ -21,37 +38,216 @@ class Conclusion(Enum):
     WAIT = "WAIT"
 
 
-def get_ref(github: GhApi, owner: str, repo: str, label: str) -> GitRef:
+@dataclass
+class Watch:
+    # A target being waited for along its last known checks
+    target: Target
+    ref: GitRef
+    check_suite: int | None = None
+    prefetched: Iterable[CheckRun] | None = None
+    checks: list[CheckRun] = field(default_factory=list)
+    conclusion: Conclusion = Conclusion.WAIT
+
+    @property
+    def sha(self) -> str:
+        return self.ref["object"]["sha"]
+
+
+def paginate(github: GitHub, operation: Callable[..., Any], key: str, **kwargs) -> Iterator[Any]:
+    page, fetched = 1, 0
+    while True:
+        result = operation(**kwargs, per_page=PER_PAGE, page=page)
+        items = result.get(key) or []
+        fetched += len(items)
+        # Evaluate before yielding: the consumer may issue other calls in between
+        more = bool(items) and has_next_page(github, fetched, result.get("total_count"))
+        yield from items
+        if not more:
+            return
+        page += 1
+
+
+def has_next_page(github: GitHub, fetched: int, total: int | None) -> bool:
+    if link := github.recv_hdrs.get("Link"):
+        return "next" in links(link)
+    return total is not None and fetched < total
+
+
+def ref_candidates(label: str) -> tuple[str, ...]:
+    # Fully qualified refs (like the default `github.ref`) are resolved with a single call
+    if label.startswith(QUALIFIED_REFS):
+        return (label,)
+    return label, f"tags/{label}", f"heads/{label}"
+
+
+def get_ref(github: GitHub, owner: str, repo: str, label: str) -> GitRef:
     label = label.removeprefix("refs/")
-    for ref in label, f"tags/{label}", f"heads/{label}":
-        try:
-            return cast(GitRef, github.git.get_ref(owner=owner, repo=repo, ref=ref))
-        except HTTP404NotFoundError:
-            continue
+    candidates = ref_candidates(label)
+    # Resolve all candidates concurrently but keep the first match in priority order
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        futures = [executor.submit(find_ref, github, owner, repo, ref) for ref in candidates]
+        for future in futures:
+            if (gitref := future.result()) is not None:
+                return gitref
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     raise errors.UnknownRef(f"Ref {label} is unknown")
 
 
-def get_current_job(github: GhApi, ctx: Context) -> Job:
-    jobs = github.actions.list_jobs_for_workflow_run(
-        owner=ctx.github.repository_owner,
-        repo=ctx.github.event.repository.name,
-        run_id=ctx.github.run_id,
-    )
-    for job in jobs["jobs"]:
-        if job["name"] == ctx.github.job:
-            return job
+async def aget_ref(github: GitHub, owner: str, repo: str, label: str) -> GitRef:
+    label = label.removeprefix("refs/")
+    tasks = [
+        asyncio.create_task(asyncio.to_thread(find_ref, github, owner, repo, ref))
+        for ref in ref_candidates(label)
+    ]
+    try:
+        for task in tasks:
+            if (gitref := await task) is not None:
+                return gitref
+    finally:
+        for task in tasks:
+            task.cancel()
+    raise errors.UnknownRef(f"Ref {label} is unknown")
+
+
+def find_ref(github: GitHub, owner: str, repo: str, ref: str) -> GitRef | None:
+    try:
+        return github.git.get_ref(owner=owner, repo=repo, ref=ref)
+    except HTTPError as error:
+        if error.code != HTTPStatus.NOT_FOUND:
+            raise
+        return None
+
+
+def get_current_job(github: GitHub, ctx: Context) -> Job:
+    jobs = current_jobs(github, ctx)
+    if ctx.runner.name and (job := jobs.on_runner(ctx.runner.name)) is not None:
+        return job
+    if (job := jobs.named(ctx.github.job)) is not None:
+        return job
     # Job not found by job-id, it must have a name
-    workflow = fetch_workflow(github, ctx.github.workflow_ref)
-    if (jobdef := workflow.get("jobs", {}).get(ctx.github.job)) is not None:
-        job_name = jobdef["name"]
-        for job in jobs["jobs"]:
-            if job["name"] == job_name:
-                return job
+    return job_from_workflow(ctx, jobs, load_workflow(github, ctx))
 
+
+async def aget_current_job(github: GitHub, ctx: Context) -> Job:
+    jobs = current_jobs(github, ctx)
+    # A job runs on a single runner at a time: no need for the workflow
+    if ctx.runner.name and (job := await asyncio.to_thread(jobs.on_runner, ctx.runner.name)):
+        return job
+    # The workflow is only needed for named jobs but is fetched meanwhile to save a round-trip
+    workflow = asyncio.create_task(asyncio.to_thread(load_workflow, github, ctx))
+    try:
+        if (job := await asyncio.to_thread(jobs.named, ctx.github.job)) is not None:
+            return job
+        return job_from_workflow(ctx, jobs, await workflow)
+    finally:
+        if not workflow.done():
+            workflow.cancel()
+        elif not workflow.cancelled():
+            workflow.exception()  # An unused failure is not worth a warning
+
+
+class JobIndex:
+    # Jobs of the current run attempt by name and by runner, only fetched until a lookup matches
+    def __init__(self, jobs: Iterator[Job]):
+        self.jobs = jobs
+        self.by_name: dict[str, Job] = {}
+        self.by_runner: dict[str, Job] = {}
+
+    def fetch(self) -> Iterator[Job]:
+        for job in self.jobs:
+            self.by_name.setdefault(job["name"], job)
+            if job["status"] == "in_progress" and (runner := job.get("runner_name")):
+                self.by_runner[runner] = job
+            yield job
+
+    def named(self, name: str) -> Job | None:
+        if (job := self.by_name.get(name)) is not None:
+            return job
+        return next((job for job in self.fetch() if job["name"] == name), None)
+
+    def on_runner(self, runner: str) -> Job | None:
+        if (job := self.by_runner.get(runner)) is not None:
+            return job
+        return next((job for job in self.fetch() if self.by_runner.get(runner) is job), None)
+
+
+def current_jobs(github: GitHub, ctx: Context) -> JobIndex:
+    owner, repo = ctx.github.repository_owner, ctx.github.event.repository.name
+    if ctx.github.run_attempt:
+        jobs = paginate(
+            github,
+            github.actions.list_jobs_for_workflow_run_attempt,
+            "jobs",
+            owner=owner,
+            repo=repo,
+            run_id=ctx.github.run_id,
+            attempt_number=ctx.github.run_attempt,
+        )
+    else:
+        jobs = paginate(
+            github,
+            github.actions.list_jobs_for_workflow_run,
+            "jobs",
+            owner=owner,
+            repo=repo,
+            run_id=ctx.github.run_id,
+        )
+    return JobIndex(jobs)
+
+
+def job_from_workflow(ctx: Context, jobs: JobIndex, workflow: dict) -> Job:
+    if (jobdef := workflow.get("jobs", {}).get(ctx.github.job)) is not None:
+        if (job := jobs.named(jobdef["name"])) is not None:
+            return job
     raise errors.JobNotFound(f"Unable to find current job {ctx.github.job}")
 
 
-def fetch_workflow(github: GhApi, workflow_ref: str) -> dict:
+def load_workflow(github: GitHub, ctx: Context) -> dict:
+    # From the local checkout, the cache or the API, in that order
+    cache = DiskCache(ctx.inputs.cache_dir, ctx.inputs.cache_size) if ctx.inputs.cache_dir else None
+    if (content := read_local_workflow(ctx)) is not None:
+        return parse_workflow(content, cache)
+    if cache is None or not ctx.github.workflow_sha:
+        return fetch_workflow(github, ctx.github.workflow_ref, cache)
+    # The ref may move but the file is immutable at a given commit
+    repo_path, _ = ctx.github.workflow_ref.split("@")
+    key = f"workflow:{repo_path}@{ctx.github.workflow_sha}"
+    if (workflow := cache.get(key)) is None:
+        workflow = fetch_workflow(github, ctx.github.workflow_ref, cache)
+        cache.set(key, workflow)
+    return workflow
+
+
+def read_local_workflow(ctx: Context) -> str | None:
+    repo_path, _ = ctx.github.workflow_ref.split("@")
+    owner, repo, path = repo_path.split("/", 2)
+    workspace = ctx.github.workspace
+    if not workspace or ctx.github.repository != f"{owner}/{repo}":
+        return None
+    # Only trust a checkout of the commit the workflow runs from
+    sha = ctx.github.workflow_sha or ctx.github.sha
+    if not sha or checkout_sha(workspace) != sha:
+        return None
+    try:
+        return (workspace / path).read_text()
+    except OSError:
+        return None
+
+
+def checkout_sha(workspace: Path) -> str | None:
+    git = workspace / ".git"
+    try:
+        head = (git / "HEAD").read_text().strip()
+        if head.startswith("ref: "):
+            return (git / head.removeprefix("ref: ")).read_text().strip()
+    except OSError:
+        return None
+    return head
+
+
+def fetch_workflow(github: GitHub, workflow_ref: str, cache: DiskCache | None = None) -> dict:
     repo_path, ref = workflow_ref.split("@")
     owner, repo, path = repo_path.split("/", 2)
     content = github.repos.get_content(
@@ -60,88 +256,426 @@ def fetch_workflow(github: GhApi, workflow_ref: str) -> dict:
         path=path,
         ref=ref.removeprefix("refs/"),
     )
-    decoded = b64decode(content.content).decode("utf8")
-    return yaml.load(decoded)
+    decoded = b64decode(content["content"]).decode("utf8")
+    return parse_workflow(decoded, cache)
+
+
+def parse_workflow(content: str, cache: DiskCache | None = None) -> dict:
+    key = f"workflow:{digest(content)}"
+    if cache and (workflow := cache.get(key)) is not None:
+        return workflow
+    workflow = workflows.parse(content)
+    if cache:
+        cache.set(key, workflow)
+    return workflow
+
+
+def iter_checks(
+    github: GitHub,
+    ctx: Context,
+    gitref: GitRef,
+    check_suite: int | None = None,
+    target: Target | None = None,
+) -> Iterator[CheckRun]:
+    target = target or ctx.inputs.target
+    params = {"owner": target.owner, "repo": target.repo}
+    checks: Iterator[CheckRun]
+    if ctx.inputs.api == "graphql":
+        checks = graphql.iter_checks(
+            github, **params, sha=gitref["object"]["sha"], check_suite=check_suite
+        )
+    elif check_suite:
+        checks = list_checks(
+            github, ctx, github.checks.list_for_suite, **params, check_suite_id=check_suite
+        )
+    else:
+        checks = list_checks(github, ctx, github.checks.list_for_ref, **params, ref=gitref["ref"])
+    if ctx.inputs.statuses and not check_suite:
+        return with_statuses(github, checks, target, gitref["object"]["sha"])
+    return checks
+
+
+def fetch_checks(
+    github: GitHub,
+    ctx: Context,
+    gitref: GitRef,
+    check_suite: int | None = None,
+    target: Target | None = None,
+) -> Iterable[CheckRun]:
+    if not (ctx.inputs.cache_dir and ctx.inputs.cache_ttl):
+        return iter_checks(github, ctx, gitref, check_suite, target)
+    # Shared with the other jobs waiting on the same commit: a single one polls at a time
+    target = target or ctx.inputs.target
+    cache = DiskCache(ctx.inputs.cache_dir, ctx.inputs.cache_size)
+    scope = (
+        target.repository,
+        gitref["object"]["sha"],
+        check_suite,
+        ctx.inputs.api,
+        ",".join(ctx.inputs.include),  # May be filtered server-side
+        ctx.inputs.statuses,
+    )
+    key = "checks:" + ":".join(str(part) for part in scope)
+    if (checks := fresh_checks(cache, key, ctx.inputs.cache_ttl)) is not None:
+        return checks
+    with cache.lock(key):
+        # Another job may have polled while waiting for the lock
+        if (checks := fresh_checks(cache, key, ctx.inputs.cache_ttl)) is not None:
+            return checks
+        checks = list(iter_checks(github, ctx, gitref, check_suite, target))
+        cache.set(key, {"time": time(), "checks": checks})
+    return checks
+
+
+def fresh_checks(cache: DiskCache, key: str, ttl: float) -> list[CheckRun] | None:
+    if (entry := cache.get(key)) is None or time() - entry["time"] > ttl:
+        return None
+    return [records.compact(check) for check in entry["checks"]]
+
+
+def list_checks(
+    github: GitHub, ctx: Context, operation: Callable[..., Any], **kwargs
+) -> Iterator[CheckRun]:
+    names = filters.literal_names(ctx.inputs.include)
+    if names is None or len(names) > MAX_CHECK_NAME_QUERIES:
+        checks = paginate(github, operation, "check_runs", **kwargs)
+    else:
+        # Only the included checks are sent by the API
+        checks = concurrently(
+            [paginate(github, operation, "check_runs", **kwargs, check_name=name) for name in names]
+        )
+    return map(records.compact, checks)
+
+
+def concurrently(iterators: list[Iterator[Any]]) -> Iterator[Any]:
+    # Consumed all at once in worker threads, yielded in order
+    executor = ThreadPoolExecutor(max_workers=len(iterators))
+    try:
+        futures = [executor.submit(list, iterator) for iterator in iterators]
+        for future in futures:
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def with_statuses(
+    github: GitHub, checks: Iterable[CheckRun], target: Target, sha: str
+) -> Iterator[CheckRun]:
+    # Commit statuses are fetched meanwhile the check runs, in the same poll
+    executor = ThreadPoolExecutor(max_workers=1)
+    fetched = executor.submit(
+        list,
+        paginate(
+            github,
+            github.repos.get_combined_status_for_ref,
+            "statuses",
+            owner=target.owner,
+            repo=target.repo,
+            ref=sha,
+        ),
+    )
+    try:
+        yield from statuses.merge(checks, fetched.result)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def select_checks(
-    github: GhApi,
+    github: GitHub,
     ctx: Context,
     gitref: GitRef,
     current_job: Job,
     check_suite: int | None = None,
-    include: str | list[str] | None = None,
-    exclude: str | list[str] | None = None,
+    checks: Iterable[CheckRun] | None = None,
+    target: Target | None = None,
 ) -> list[CheckRun]:
-    params = {"owner": ctx.inputs.target_owner, "repo": ctx.inputs.target_repo}
-    if check_suite:
-        result = github.checks.list_for_suite(**params, check_suite_id=check_suite)
-    else:
-        result = github.checks.list_for_ref(**params, ref=gitref["ref"])
-    checks = cast(CheckRunList, result).get("check_runs") or []
-    filtered = (check for check in checks if check["name"] != current_job["name"])
-    return list(filtered)
+    if checks is None:
+        checks = fetch_checks(github, ctx, gitref, check_suite, target)
+    matches = ctx.inputs.check_filter
+    selected: list[CheckRun] = []
+    for check in checks:
+        # Filtered while streaming the pages, skipped checks are never kept
+        if check["name"] == current_job["name"] or not matches(check["name"]):
+            continue
+        selected.append(check)
+        if fails_requirements(ctx, check):
+            # Conclusion is already known to be KO, don't fetch the remaining pages
+            break
+    return selected
+
+
+async def aselect_checks(
+    github: GitHub,
+    ctx: Context,
+    gitref: GitRef,
+    current_job: Job,
+    check_suite: int | None = None,
+    checks: Iterable[CheckRun] | None = None,
+    target: Target | None = None,
+) -> list[CheckRun]:
+    # Pages are fetched in a worker thread, not blocking the other targets
+    return await asyncio.to_thread(
+        select_checks, github, ctx, gitref, current_job, check_suite, checks=checks, target=target
+    )
 
 
-def decide_for_checks(ctx: Context, checks: list[CheckRun]) -> Conclusion:
-    if not checks:
-        return Conclusion.OK
+def fails_requirements(ctx: Context, check: CheckRun) -> bool:
+    # Whether the conclusion is KO whatever the other checks are
+    if check["status"] == "completed":
+        return has_failed(ctx, check) and (ctx.inputs.fail_fast or not ctx.inputs.wait)
+    return not ctx.inputs.wait
 
-    completed = [check for check in checks if check["status"] == "completed"]
-    remaining = [check for check in checks if check["status"] != "completed"]
 
-    if any(check["conclusion"] not in ctx.inputs.conclusions for check in completed):
-        return Conclusion.KO
-    elif remaining:
-        return Conclusion.WAIT if ctx.inputs.wait else Conclusion.KO
-    else:
-        return Conclusion.OK
+def has_failed(ctx: Context, check: CheckRun) -> bool:
+    return check["status"] == "completed" and check["conclusion"] not in ctx.inputs.conclusions
+
+
+def decide_for_checks(ctx: Context, checks: Iterable[CheckRun]) -> Conclusion:
+    # Single pass over the checks, concluding as soon as the outcome can't change anymore
+    pending = failed = False
+    for check in checks:
+        if fails_requirements(ctx, check):
+            return Conclusion.KO
+        pending = pending or check["status"] != "completed"
+        failed = failed or has_failed(ctx, check)
+    if pending:
+        return Conclusion.WAIT
+    return Conclusion.KO if failed else Conclusion.OK
+
+
+def unmet_requirements(ctx: Context, checks: list[CheckRun]) -> errors.RequirementsNotMet:
+    failed = next((check for check in checks if has_failed(ctx, check)), None)
+    if ctx.inputs.fail_fast and failed:
+        return errors.RequirementsNotMet(
+            f"Check {failed['name']} concluded with {failed['conclusion']}, failing fast"
+        )
+    return errors.RequirementsNotMet("Some checks don't meet the requirements")
+
+
+def get_check_suite(github: GitHub, target: Target, ref: GitRef, workflow: str) -> int | None:
+    runs = github.actions.list_workflow_runs(
+        owner=target.owner,
+        repo=target.repo,
+        workflow_id=workflow,
+        head_sha=ref["object"]["sha"],
+    )
+    if not runs["workflow_runs"]:
+        raise errors.RequirementsNotMet("The workflow was not run on the commit")
+    sorted_runs = sorted(
+        runs["workflow_runs"],
+        key=lambda r: (r["run_number"], r.get("run_attempt", 0)),
+        reverse=True,
+    )
+    last_run = next(iter(sorted_runs))
+    return last_run.get("check_suite_id")
 
 
 def run(ctx: Context):
-    ui.display_inputs("Inputs", ctx)
+    asyncio.run(arun(ctx))
+
 
-    github = GhApi(token=ctx.inputs.token)
-    ref = get_ref(github, ctx.inputs.target_owner, ctx.inputs.target_repo, ctx.inputs.ref)
-    print(f"🔖 {ui.bold('Current ref')}: {ui.ref_type(ref)}")
+async def arun(ctx: Context):
+    ui.display_inputs("Inputs", ctx)
 
-    job = get_current_job(github, ctx)
+    deadline = scheduler.Deadline(ctx.inputs.wait_timeout or None)
+    github = GitHub(token=ctx.inputs.token, deadline=deadline, retries=ctx.inputs.retries)
+    if ctx.inputs.server:
+        job = await aget_current_job(github, ctx)
+        print(f"💼 {ui.bold('Current job')}: {job['name']} (#{job['id']})")
+        print(f"📡 Waiting for the verdict of {ctx.inputs.server}")
+        return await asyncio.to_thread(delegate, ctx, job)
+    # Targets and the current job are resolved concurrently
+    watching = asyncio.gather(*(watch(github, ctx, target) for target in ctx.inputs.all_targets))
+    watches, job = await asyncio.gather(watching, aget_current_job(github, ctx))
+    for watched in watches:
+        label = "Current ref" if len(watches) == 1 else str(watched.target)
+        print(f"🔖 {ui.bold(label)}: {ui.ref_type(watched.ref)}")
     print(f"💼 {ui.bold('Current job')}: {job['name']} (#{job['id']})")
 
+    with webhook.receive(ctx, {watched.sha: watched.check_suite for watched in watches}) as table:
+        await wait_for_checks(github, ctx, watches, job, deadline, table)
+
+
+def delegate(ctx: Context, job: Job):
+    # The `serve` daemon polls the targets once for all the jobs waiting on them,
+    # the webhook settings (and secret) are left to the job
+    exclude = {"token", "server", "wait_mode", "webhook_port", "webhook_secret"}
+    inputs = ctx.inputs.model_dump(mode="json", exclude=exclude)
+    body = json.dumps({"inputs": inputs, "job": job["name"]}).encode()
+    request = Request(ctx.inputs.server, body, {"Content-Type": "application/json"}, method="POST")
+    # The server answers by the wait timeout, unless it went away
+    timeout = ctx.inputs.wait_timeout + DELEGATE_TIMEOUT_MARGIN if ctx.inputs.wait_timeout else None
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            verdict = json.loads(response.read())
+    except HTTPError as error:
+        raise errors.ActionError(json.loads(error.read() or "{}").get("message", error)) from error
+    except (OSError, HTTPException) as error:
+        raise errors.ActionError(f"Server {ctx.inputs.server} unreachable: {error}") from error
+    ui.display_checks("Found checks", verdict["checks"])
+    match Conclusion(verdict["conclusion"]):
+        case Conclusion.OK:
+            print(f"✅ {verdict['message']}")
+        case Conclusion.KO:
+            raise errors.RequirementsNotMet(verdict["message"])
+        case Conclusion.WAIT:
+            raise errors.Timeout(verdict["message"])
+
+
+async def watch(github: GitHub, ctx: Context, target: Target) -> Watch:
+    prefetched: Iterable[CheckRun] | None = None
+    if ctx.inputs.api == "graphql":
+        ref, prefetched = await asyncio.to_thread(
+            graphql.resolve, github, target.owner, target.repo, target.ref
+        )
+    else:
+        ref = await aget_ref(github, target.owner, target.repo, target.ref)
     check_suite: int | None = None
     if ctx.inputs.workflow:
-        runs = github.actions.list_workflow_runs(
-            owner=ctx.inputs.target_owner,
-            repo=ctx.inputs.target_repo,
-            workflow_id=ctx.inputs.workflow,
-            head_sha=ref["object"]["sha"],
-        )
-        if not runs.workflow_runs:
-            raise errors.RequirementsNotMet("The workflow was not run on the commit")
-        sorted_runs = sorted(
-            cast(list[WorkflowRun], runs.workflow_runs),
-            key=lambda r: (r["run_number"], r.get("run_attempt", 0)),
-            reverse=True,
+        check_suite = await asyncio.to_thread(
+            get_check_suite, github, target, ref, ctx.inputs.workflow
         )
-        last_run = next(iter(sorted_runs))
-        check_suite = last_run.get("check_suite_id")
+        if prefetched is not None and check_suite:
+            prefetched = graphql.in_suite(iter(prefetched), check_suite)
+    if prefetched is not None and ctx.inputs.statuses and not check_suite:
+        prefetched = with_statuses(github, prefetched, target, ref["object"]["sha"])
+    watched = Watch(target, ref, check_suite, prefetched)
+    if prefetched is None:
+        # Don't wait for the current job to be known before fetching the checks
+        watched.prefetched = await asyncio.to_thread(prefetch_checks, github, ctx, watched)
+    return watched
+
+
+def prefetch_checks(github: GitHub, ctx: Context, watched: Watch) -> list[CheckRun]:
+    matches = ctx.inputs.check_filter
+    checks: list[CheckRun] = []
+    for check in fetch_checks(github, ctx, watched.ref, watched.check_suite, watched.target):
+        if not matches(check["name"]):
+            continue
+        checks.append(check)
+        # Only completed checks can fail early, the current job not being known yet
+        if check["status"] == "completed" and fails_requirements(ctx, check):
+            break
+    return checks
+
 
-    waited_for = 0
+async def wait_for_checks(
+    github: GitHub,
+    ctx: Context,
+    watches: list[Watch],
+    job: Job,
+    deadline: scheduler.Deadline,
+    table: webhook.CheckTable | None = None,
+):
+    # All targets share the client and the poll schedule
+    poll = scheduler.for_inputs(ctx.inputs)
+    updated = False  # Whether checks have been updated by webhook events
     while True:
-        checks = select_checks(github, ctx, ref, job, check_suite=check_suite)
-        ui.display_checks("Found checks", checks)
-        match decide_for_checks(ctx, checks):
+        requests = github.requests
+        version = table.version if table else 0
+        pending = [watched for watched in watches if watched.conclusion == Conclusion.WAIT]
+        await refresh(github, ctx, pending, job, table, updated)
+        checks = [check for watched in watches for check in watched.checks]
+        if len(watches) == 1:
+            ui.display_checks("Found checks", checks)
+        else:
+            ui.display_checks("Found checks", {str(w.target): w.checks for w in watches})
+        ui.display_rate_limit(github.rate_limit)
+        match aggregate(ctx, [watched.conclusion for watched in watches]):
             case Conclusion.OK:
                 print("✅ All checks met the requirements")
-                break
+                return
             case Conclusion.KO:
-                raise errors.RequirementsNotMet("Some checks don't meet the requirements")
+                raise unmet_requirements(ctx, checks)
             case Conclusion.WAIT:
-                if ctx.inputs.wait_timeout and waited_for >= ctx.inputs.wait_timeout:
-                    raise errors.Timeout(f"Timeout reached after waiting for {waited_for}s")
-                print(f"⏳ Waiting for {ctx.inputs.wait_interval} seconds")
-                waited_for += ctx.inputs.wait_interval
-                sleep(ctx.inputs.wait_interval)
+                interval = next_interval(github, poll, checks, deadline, github.requests - requests)
+                if table is None:
+                    print(f"⏳ Waiting for {interval:.0f} seconds")
+                    await sleep(interval)
+                else:
+                    print(f"⏳ Waiting for check events up to {interval:.0f} seconds")
+                    updated = await wait_for_events(table, version, interval)
+
+
+async def wait_for_events(table: webhook.CheckTable, version: int, timeout: float) -> bool:
+    try:
+        return await asyncio.to_thread(table.wait, version, timeout)
+    except asyncio.CancelledError:
+        table.interrupt()  # Release the waiting thread
+        raise
+
+
+async def refresh(
+    github: GitHub,
+    ctx: Context,
+    watches: list[Watch],
+    job: Job,
+    table: webhook.CheckTable | None = None,
+    updated: bool = False,
+):
+    # Requests are grouped per repository, repositories being polled concurrently
+    repositories: dict[str, list[Watch]] = defaultdict(list)
+    for watched in watches:
+        repositories[watched.target.repository].append(watched)
+
+    async def refresh_repository(watches: list[Watch]):
+        for watched in watches:
+            await refresh_watch(github, ctx, watched, job, table, updated)
+
+    await asyncio.gather(*(refresh_repository(watches) for watches in repositories.values()))
+
+
+async def refresh_watch(
+    github: GitHub,
+    ctx: Context,
+    watched: Watch,
+    job: Job,
+    table: webhook.CheckTable | None = None,
+    updated: bool = False,
+):
+    if table and updated and (events := table.snapshot(watched.sha)) is not None:
+        watched.checks = select_checks(github, ctx, watched.ref, job, checks=events)
+    else:
+        watched.checks = await aselect_checks(
+            github,
+            ctx,
+            watched.ref,
+            job,
+            watched.check_suite,
+            checks=watched.prefetched,
+            target=watched.target,
+        )
+        if table:
+            table.reset(watched.sha, watched.checks)
+    watched.prefetched = None
+    watched.conclusion = decide_for_checks(ctx, watched.checks)
+
+
+def aggregate(ctx: Context, conclusions: Iterable[Conclusion]) -> Conclusion:
+    # Conclusion over all targets
+    conclusions = set(conclusions)
+    if Conclusion.KO in conclusions and (
+        ctx.inputs.fail_fast or Conclusion.WAIT not in conclusions
+    ):
+        return Conclusion.KO
+    return Conclusion.WAIT if Conclusion.WAIT in conclusions else Conclusion.OK
+
+
+def next_interval(
+    github: GitHub,
+    poll: scheduler.Scheduler,
+    checks: list[CheckRun],
+    deadline: scheduler.Deadline,
+    calls: int,
+) -> float:
+    if deadline.expired:
+        raise errors.Timeout(f"Timeout reached after waiting for {deadline.elapsed:.0f}s")
+    interval = poll.next_interval(checks)
+    if (paced := github.pace(calls)) > interval:
+        print("🐢 Slowing down to preserve the API rate limit")
+        interval = paced
+    # Last poll happens right on the deadline
+    return min(interval, deadline.remaining)
 
 
 @click.command
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from hashlib import sha256
+from itertools import chain
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any
+
+MAX_ENTRIES = 128
+LEFTOVERS_TTL = (
+    3600  # Age (in seconds) past which locks without entry and partial writes are removed
+)
+
+
+def digest(data: str | bytes) -> str:
+    return sha256(data.encode() if isinstance(data, str) else data).hexdigest()
+
+
+class DiskCache:
+    # JSON entries stored under the digest of their key, so it can be persisted
+    # with `actions/cache` or live in a self-hosted runner directory.
+    # Least recently used entries (by modification time) are evicted past `max_entries`,
+    # stale locks and the leftovers of interrupted writes after `LEFTOVERS_TTL`.
+    def __init__(self, directory: Path, max_entries: int = MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{digest(key)}.json"
+
+    def get(self, key: str) -> Any | None:
+        path = self.path(key)
+        try:
+            value = json.loads(path.read_text())
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def set(self, key: str, value: Any):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial entry
+        with NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False) as tmp:
+            json.dump(value, tmp, default=dict)  # Mappings such as check records
+        os.replace(tmp.name, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # Evicted meanwhile by another process
+        entries.sort(reverse=True)
+        # Their locks may still be held or awaited, and are only swept once unused
+        for _, path in entries[self.max_entries :]:
+            path.unlink(missing_ok=True)
+        expired = time() - LEFTOVERS_TTL
+        for path in chain(self.directory.glob("*.tmp"), self.directory.glob("*.lock")):
+            try:
+                if path.stat().st_mtime < expired and not path.with_suffix(".json").exists():
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        # Exclusive across the processes sharing the directory, like jobs of a self-hosted runner
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"{digest(key)}.lock", "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            os.utime(file.fileno())  # In use, not a leftover
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.client import HTTPException
+from operator import attrgetter
+from threading import Lock, local
+from time import sleep, time
+from typing import TYPE_CHECKING, Any, NamedTuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import Request
+
+from . import errors
+from .scheduler import Deadline, jitter
+from .transport import ConnectionPool, Transport
+
+if TYPE_CHECKING:
+    from .types import CheckRunList, CombinedStatus, Content, GitRef, JobList, WorkflowRunList
+
+GH_HOST = "https://api.github.com"
+
+REQUEST_TIMEOUT = 30  # Max duration (in seconds) of a single request
+MIN_REQUEST_TIMEOUT = 5  # Still allow requests issued right on the deadline to complete
+RATE_LIMIT_RESERVE = 0.25  # Start pacing requests below this fraction of the rate limit
+RATE_LIMIT_RETRIES = 3
+SECONDARY_RATE_LIMIT_WAIT = 60  # GitHub asks to wait at least a minute without `Retry-After`
+SECONDARY_RATE_LIMIT_MESSAGE = "secondary rate limit"
+RETRIES = 3
+RETRY_BACKOFF = 1  # Delay (in seconds) before the first retry of a transient failure
+MAX_RETRY_BACKOFF = 30
+MAX_CACHED_RESPONSES = 256  # Long-running processes poll ever new URLs
+# Network failures worth a retry (`HTTPError` being a `URLError`, it is handled separately)
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, HTTPException, URLError)
+LINK = re.compile(r'<(?P<url>[^>]*)>\s*;\s*rel="(?P<rel>[^"]*)"')
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    headers: dict[str, str]
+
+
+def header(headers: Mapping[str, str], name: str) -> str | None:
+    name = name.lower()
+    return next((value for key, value in headers.items() if key.lower() == name), None)
+
+
+@dataclass
+class RateLimit:
+    limit: int
+    remaining: int
+    reset: float  # UTC epoch seconds
+    resource: str = "core"
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> RateLimit | None:
+        if (remaining := header(headers, "X-RateLimit-Remaining")) is None:
+            return None
+        return cls(
+            limit=int(header(headers, "X-RateLimit-Limit") or 0),
+            remaining=int(remaining),
+            reset=float(header(headers, "X-RateLimit-Reset") or 0),
+            resource=header(headers, "X-RateLimit-Resource") or "core",
+        )
+
+    @property
+    def resets_in(self) -> float:
+        return max(0, self.reset - time())
+
+    @property
+    def low(self) -> bool:
+        return self.remaining < self.limit * RATE_LIMIT_RESERVE
+
+    def pace(self, calls: int) -> float:
+        # Minimum delay between polls costing `calls` requests to last until the reset
+        if not self.low:
+            return 0
+        return self.resets_in * max(calls, 1) / max(self.remaining, 1)
+
+
+def retry_after(error: HTTPError) -> float | None:
+    if error.code not in (HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS):
+        return None
+    headers = dict(error.headers or {})
+    if (delay := header(headers, "Retry-After")) is not None:
+        return float(delay)
+    if header(headers, "X-RateLimit-Remaining") == "0":
+        return max(0, float(header(headers, "X-RateLimit-Reset") or 0) - time())
+    if error.code == HTTPStatus.TOO_MANY_REQUESTS or is_secondary_rate_limit(error):
+        return SECONDARY_RATE_LIMIT_WAIT
+    return None  # A genuine permission error
+
+
+def is_secondary_rate_limit(error: HTTPError) -> bool:
+    # Also sent as a bare 403, only told apart from a permission error by its message
+    try:
+        body = error.read() or b""
+    except (OSError, ValueError):
+        return False
+    return SECONDARY_RATE_LIMIT_MESSAGE in body.decode(errors="replace").lower()
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, HTTPError):
+        return error.code >= HTTPStatus.INTERNAL_SERVER_ERROR
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def is_idempotent(path: str, verb: str | None, data: Any) -> bool:
+    if path == "/graphql":  # Queries are read-only, only mutations are not
+        return not str((data or {}).get("query", "")).lstrip().startswith("mutation")
+    return not data and (verb or "GET").upper() in ("GET", "HEAD")
+
+
+def cache_key(path: str, route: dict | None, query: dict | None) -> str:
+    url = path.format(**route) if route else path
+    return f"{url}?{urlencode(query)}" if query else url
+
+
+def params(**kwargs: Any) -> dict[str, Any]:
+    # Query parameters actually given, in the order of the API specification
+    return {key: value for key, value in kwargs.items() if value is not None}
+
+
+def links(header: str | None) -> dict[str, str]:
+    # URLs of a `Link` header by relation (`next`, `last`...)
+    return {match["rel"]: match["url"] for match in LINK.finditer(header or "")}
+
+
+class GitHub:
+    # A client limited to the endpoints the action relies on, returning plain decoded JSON.
+    # Requests go through a keep-alive connection pool (or any given `transport`).
+    # GET responses are cached per endpoint along their `ETag` so polling sends `If-None-Match`
+    # and reuses the cached body on `304 Not Modified`, which doesn't count against the rate limit.
+    def __init__(
+        self,
+        token: str | None = None,
+        deadline: Deadline | None = None,
+        transport: Transport | None = None,
+        retries: int = RETRIES,
+        gh_host: str | None = None,
+        max_cached: int = MAX_CACHED_RESPONSES,
+    ):
+        self.headers = {"Accept": "application/vnd.github.v3+json"}
+        if token := token or os.getenv("GITHUB_TOKEN"):
+            self.headers["Authorization"] = f"token {token}"
+        self.gh_host = gh_host or GH_HOST
+        self.git = Git(self)
+        self.actions = Actions(self)
+        self.repos = Repos(self)
+        self.checks = Checks(self)
+        self.retries = retries
+        self.cache: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.max_cached = max_cached
+        self.cache_lock = Lock()
+        self.deadline = deadline or Deadline()
+        self.transport = transport or ConnectionPool().urlopen
+        self.rate_limits: dict[str, RateLimit] = {}
+        self.requests = 0
+        self.local = local()
+
+    @property
+    def recv_hdrs(self) -> dict[str, str]:
+        # Per thread as the client is shared by concurrent calls
+        return getattr(self.local, "recv_hdrs", {})
+
+    @recv_hdrs.setter
+    def recv_hdrs(self, headers: dict[str, str]):
+        self.local.recv_hdrs = headers
+
+    def __call__(
+        self,
+        path: str,
+        verb: str | None = None,
+        headers: dict | None = None,
+        route: dict | None = None,
+        query: dict | None = None,
+        data: Any = None,
+        timeout: float | None = None,
+        decode: bool = True,
+    ) -> Any:
+        idempotent = is_idempotent(path, verb, data)
+        throttled = failures = 0
+        while True:
+            try:
+                content = self.request(path, verb, headers, route, query, data, timeout)
+                return self.decode(content, {**self.headers, **(headers or {})}, decode)
+            except HTTPError as error:
+                if (delay := retry_after(error)) is not None and throttled < RATE_LIMIT_RETRIES:
+                    throttled += 1
+                    if delay > self.deadline.remaining:
+                        raise errors.RateLimited(
+                            f"API rate limit exceeded, retry possible in {delay:.0f}s"
+                        ) from error
+                    print(f"🚦 API rate limit exceeded, retrying in {delay:.0f}s")
+                elif idempotent and is_transient(error) and failures < self.retries:
+                    failures += 1
+                    delay = self.backoff(error, failures)
+                else:
+                    raise
+            except TRANSIENT_ERRORS as error:
+                if not idempotent or failures >= self.retries:
+                    raise
+                failures += 1
+                delay = self.backoff(error, failures)
+            sleep(delay)
+
+    def backoff(self, error: Exception, failures: int) -> float:
+        # Exponential backoff with jitter, giving up if the retry would overrun the deadline
+        delay = jitter(min(RETRY_BACKOFF * 2 ** (failures - 1), MAX_RETRY_BACKOFF))
+        if delay > self.deadline.remaining:
+            raise error
+        reason = f"HTTP {error.code}" if isinstance(error, HTTPError) else type(error).__name__
+        print(f"🔁 API request failed ({reason}), retry {failures}/{self.retries} in {delay:.0f}s")
+        return delay
+
+    def request(
+        self,
+        path: str,
+        verb: str | None,
+        headers: dict | None,
+        route: dict | None,
+        query: dict | None,
+        data: Any,
+        timeout: float | None,
+    ) -> bytes:
+        if timeout is None:
+            timeout = self.request_timeout()
+        if data or (verb or "GET").upper() != "GET":
+            return self.send(path, verb, headers, route, query, data, timeout)
+
+        key = cache_key(path, route, query)
+        if cached := self.cached(key):
+            headers = {**(headers or {}), "If-None-Match": cached.etag}
+        try:
+            response = self.send(path, verb, headers, route, query, data, timeout)
+        except HTTPError as error:
+            if cached and error.code == HTTPStatus.NOT_MODIFIED:
+                self.recv_hdrs = {**cached.headers, **dict(error.headers or {})}
+                self.track_rate_limit()
+                return cached.body
+            raise
+        if etag := header(self.recv_hdrs, "ETag"):
+            # The raw body, not the decoded one: callers only keep the fields they need
+            self.remember(key, CachedResponse(etag, response, self.recv_hdrs))
+        return response
+
+    def cached(self, key: str) -> CachedResponse | None:
+        with self.cache_lock:
+            if (cached := self.cache.get(key)) is not None:
+                self.cache.move_to_end(key)
+            return cached
+
+    def remember(self, key: str, response: CachedResponse):
+        # Least recently used responses are evicted past `max_cached`
+        with self.cache_lock:
+            self.cache[key] = response
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_cached:
+                self.cache.popitem(last=False)
+
+    def request_timeout(self) -> float:
+        return min(REQUEST_TIMEOUT, max(self.deadline.remaining, MIN_REQUEST_TIMEOUT))
+
+    def send(
+        self,
+        path: str,
+        verb: str | None,
+        headers: dict | None,
+        route: dict | None,
+        query: dict | None,
+        data: Any,
+        timeout: float | None,
+    ) -> bytes:
+        verb = (verb or ("POST" if data else "GET")).upper()
+        headers = {**self.headers, **(headers or {})}
+        url = path if path.startswith(("http://", "https://")) else self.gh_host + path
+        if route:
+            url = url.format(**{key: quote(str(value)) for key, value in route.items()})
+        if query:
+            url = f"{url}?{urlencode(query)}"
+        body = json.dumps(data).encode() if isinstance(data, dict) else data
+        request = Request(url, body or None, headers, method=verb)
+        self.requests += 1
+        try:
+            with self.transport(request, timeout=timeout) as response:
+                content, self.recv_hdrs = response.read(), dict(response.headers)
+        except HTTPError as error:
+            self.recv_hdrs = dict(error.headers or {})
+            self.track_rate_limit()
+            raise
+        self.track_rate_limit()
+        return content
+
+    def decode(self, content: bytes, headers: dict, decode: bool) -> Any:
+        # Plain dicts, matching the `types` definitions without any wrapping
+        if "json" in headers["Accept"] and decode is True:
+            return json.loads(content) if content else None
+        return content.decode() if decode else content
+
+    def track_rate_limit(self):
+        if (rate_limit := RateLimit.from_headers(self.recv_hdrs)) is None:
+            return
+        self.rate_limits[rate_limit.resource] = rate_limit
+
+    @property
+    def rate_limit(self) -> RateLimit | None:
+        # The most constrained budget
+        return min(self.rate_limits.values(), key=attrgetter("remaining"), default=None)
+
+    def pace(self, calls: int) -> float:
+        return max((rate_limit.pace(calls) for rate_limit in self.rate_limits.values()), default=0)
+
+
+class Endpoints:
+    def __init__(self, client: GitHub):
+        self.client = client
+
+
+class Git(Endpoints):
+    def get_ref(self, owner: str, repo: str, ref: str) -> GitRef:
+        return self.client(
+            "/repos/{owner}/{repo}/git/ref/{ref}", route={"owner": owner, "repo": repo, "ref": ref}
+        )
+
+
+class Actions(Endpoints):
+    def list_jobs_for_workflow_run(
+        self,
+        owner: str,
+        repo: str,
+        run_id: int,
+        per_page: int | None = None,
+        page: int | None = None,
+    ) -> JobList:
+        return self.client(
+            "/repos/{owner}/{repo}/actions/runs/{run_id}/jobs",
+            route={"owner": owner, "repo": repo, "run_id": run_id},
+            query=params(per_page=per_page, page=page),
+        )
+
+    def list_jobs_for_workflow_run_attempt(
+        self,
+        owner: str,
+        repo: str,
+        run_id: int,
+        attempt_number: int,
+        per_page: int | None = None,
+        page: int | None = None,
+    ) -> JobList:
+        return self.client(
+            "/repos/{owner}/{repo}/actions/runs/{run_id}/attempts/{attempt_number}/jobs",
+            route={
+                "owner": owner,
+                "repo": repo,
+                "run_id": run_id,
+                "attempt_number": attempt_number,
+            },
+            query=params(per_page=per_page, page=page),
+        )
+
+    def list_workflow_runs(
+        self, owner: str, repo: str, workflow_id: int | str, head_sha: str | None = None
+    ) -> WorkflowRunList:
+        return self.client(
+            "/repos/{owner}/{repo}/actions/workflows/{workflow_id}/runs",
+            route={"owner": owner, "repo": repo, "workflow_id": workflow_id},
+            query=params(head_sha=head_sha),
+        )
+
+
+class Repos(Endpoints):
+    def get_content(self, owner: str, repo: str, path: str, ref: str | None = None) -> Content:
+        return self.client(
+            "/repos/{owner}/{repo}/contents/{path}",
+            route={"owner": owner, "repo": repo, "path": path},
+            query=params(ref=ref),
+        )
+
+    def get_combined_status_for_ref(
+        self,
+        owner: str,
+        repo: str,
+        ref: str,
+        per_page: int | None = None,
+        page: int | None = None,
+    ) -> CombinedStatus:
+        return self.client(
+            "/repos/{owner}/{repo}/commits/{ref}/status",
+            route={"owner": owner, "repo": repo, "ref": ref},
+            query=params(per_page=per_page, page=page),
+        )
+
+
+class Checks(Endpoints):
+    def list_for_ref(
+        self,
+        owner: str,
+        repo: str,
+        ref: str,
+        check_name: str | None = None,
+        per_page: int | None = None,
+        page: int | None = None,
+    ) -> CheckRunList:
+        return self.client(
+            "/repos/{owner}/{repo}/commits/{ref}/check-runs",
+            route={"owner": owner, "repo": repo, "ref": ref},
+            query=params(check_name=check_name, per_page=per_page, page=page),
+        )
+
+    def list_for_suite(
+        self,
+        owner: str,
+        repo: str,
+        check_suite_id: int,
+        check_name: str | None = None,
+        per_page: int | None = None,
+        page: int | None = None,
+    ) -> CheckRunList:
+        return self.client(
+            "/repos/{owner}/{repo}/check-suites/{check_suite_id}/check-runs",
+            route={"owner": owner, "repo": repo, "check_suite_id": check_suite_id},
+            query=params(check_name=check_name, per_page=per_page, page=page),
+        )
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import re
 from functools import cached_property
 from pathlib import Path
 from types import GenericAlias
-from typing import Any
+from typing import Any, NamedTuple
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
 from pydantic.fields import Field, FieldInfo, computed_field
 from pydantic_settings import (
     BaseSettings,
@@ -14,7 +15,8 @@ from pydantic_settings import (
     SettingsConfigDict,
 )
 
-from need_checks.types import Conclusion
+from need_checks.filters import CheckFilter, check_filter, compile_patterns
+from need_checks.types import Api, Conclusion, WaitMode, WaitStrategy
 
 
 class BaseContext(BaseSettings):
@@ -33,15 +35,53 @@ class BaseContext(BaseSettings):
         )
 
 
+class Target(NamedTuple):
+    owner: str
+    repo: str
+    ref: str
+
+    @classmethod
+    def parse(cls, value: str) -> Target:
+        repository, _, ref = value.strip().partition("@")
+        owner, _, repo = repository.partition("/")
+        if not (owner and repo and ref):
+            raise ValueError(f"Invalid target `{value}`, expected `owner/repo@ref`")
+        return cls(owner, repo, ref)
+
+    @property
+    def repository(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    def __str__(self) -> str:
+        return f"{self.repository}@{self.ref}"
+
+
 class Inputs(BaseContext):
     token: str = ""
     repository: str = ""
     ref: str = ""
+    targets: list[str] = []
     workflow: str | None = None
+    api: Api = "rest"
     wait: bool = False
     wait_interval: int = 60
     wait_timeout: int | None = None
+    wait_mode: WaitMode = "poll"
+    webhook_port: int = 8080
+    webhook_secret: str = ""
+    wait_strategy: WaitStrategy = "fixed"
+    min_interval: int = 5
+    max_interval: int = 300
+    retries: int = 3
+    cache_dir: Path | None = None
+    cache_size: int = 128
+    cache_ttl: int = 0
+    include: list[str] = []
+    exclude: list[str] = []
     conclusions: list[Conclusion] = ["success", "skipped"]
+    statuses: bool = False
+    fail_fast: bool = True
+    server: str = ""
 
     model_config = SettingsConfigDict(env_prefix="INPUT_")
 
@@ -55,7 +95,45 @@ class Inputs(BaseContext):
         _, repo = self.repository.split("/", 1)
         return repo
 
-    @field_validator("wait_timeout", "workflow", mode="before")
+    @property
+    def target(self) -> Target:
+        return Target(self.target_owner, self.target_repo, self.ref)
+
+    @property
+    def all_targets(self) -> list[Target]:
+        return [Target.parse(target) for target in self.targets] or [self.target]
+
+    @field_validator("targets")
+    @classmethod
+    def valid_targets(cls, v: list[str]) -> list[str]:
+        targets = [target.strip() for target in v if target.strip()]
+        for target in targets:
+            Target.parse(target)
+        return targets
+
+    @property
+    def check_filter(self) -> CheckFilter:
+        return check_filter(tuple(self.include), tuple(self.exclude))
+
+    @field_validator("include", "exclude")
+    @classmethod
+    def valid_patterns(cls, v: list[str]) -> list[str]:
+        patterns = [pattern.strip() for pattern in v if pattern.strip()]
+        for pattern in patterns:
+            try:
+                compile_patterns((pattern,))
+            except re.error as error:
+                raise ValueError(f"Invalid pattern `{pattern}`: {error}") from error
+        return patterns
+
+    @model_validator(mode="after")
+    def signed_webhooks(self) -> Inputs:
+        # Anyone reaching the port could otherwise forge a successful check run
+        if self.wait_mode == "webhook" and not self.webhook_secret:
+            raise ValueError("A `webhook_secret` is required in `webhook` wait mode")
+        return self
+
+    @field_validator("wait_timeout", "workflow", "cache_dir", mode="before")
     @classmethod
     def optional_str(cls, v: Any) -> int | None:
         match v:
@@ -77,8 +155,13 @@ class GithubContext(BaseContext):
     repository_owner: str
     job: str
     run_id: int
+    run_attempt: int | None = None
     event_path: Path
     workflow_ref: str
+    workflow_sha: str | None = None
+    repository: str | None = None
+    sha: str | None = None
+    workspace: Path | None = None
 
     model_config = SettingsConfigDict(env_prefix="GITHUB_", extra="ignore")
 
@@ -88,8 +171,15 @@ class GithubContext(BaseContext):
         return Event.model_validate_json(self.event_path.read_text())
 
 
+class RunnerContext(BaseContext):
+    name: str | None = None
+
+    model_config = SettingsConfigDict(env_prefix="RUNNER_", extra="ignore")
+
+
 class Context(BaseContext):
     github: GithubContext = Field(default_factory=GithubContext)
+    runner: RunnerContext = Field(default_factory=RunnerContext)
     inputs: Inputs = Field(default_factory=Inputs)
 
 
@@ -19,3 +19,15 @@ class RequirementsNotMet(ActionError):
 
 class Timeout(ActionError):
     pass
+
+
+class GraphQLError(ActionError):
+    pass
+
+
+class RateLimited(ActionError):
+    pass
+
+
+class PollFailed(ActionError):
+    pass
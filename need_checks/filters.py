@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from fnmatch import translate
+from functools import cache
+
+REGEX_PREFIX = "re:"
+GLOB_CHARS = frozenset("*?[")
+
+
+def as_regex(pattern: str) -> str:
+    # Glob patterns match the whole name, regular expressions any part of it
+    if pattern.startswith(REGEX_PREFIX):
+        return f".*?(?:{pattern.removeprefix(REGEX_PREFIX)})"
+    return translate(pattern)
+
+
+def literal_names(patterns: list[str]) -> list[str] | None:
+    # Exact check names if no pattern needs to be matched client-side
+    if not patterns or any(
+        pattern.startswith(REGEX_PREFIX) or GLOB_CHARS & set(pattern) for pattern in patterns
+    ):
+        return None
+    return patterns
+
+
+def compile_patterns(patterns: tuple[str, ...]) -> re.Pattern[str] | None:
+    # A single alternation so a name is matched in one pass whatever the number of patterns
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{as_regex(pattern)})" for pattern in patterns))
+
+
+@dataclass(frozen=True)
+class CheckFilter:
+    include: re.Pattern[str] | None = None
+    exclude: re.Pattern[str] | None = None
+
+    def __call__(self, name: str) -> bool:
+        if self.include and not self.include.match(name):
+            return False
+        return not (self.exclude and self.exclude.match(name))
+
+
+@cache
+def check_filter(include: tuple[str, ...], exclude: tuple[str, ...]) -> CheckFilter:
+    return CheckFilter(compile_patterns(include), compile_patterns(exclude))
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, cast
+
+from . import errors, records
+from .types import CheckRun, GitRef
+
+if TYPE_CHECKING:
+    from .client import GitHub
+
+CHECK_RUNS = """
+fragment CheckRuns on CheckRunConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes { id databaseId name status conclusion startedAt completedAt detailsUrl permalink }
+}
+"""
+
+CHECK_SUITES = """
+fragment CheckSuites on Commit {
+  oid
+  checkSuites(first: 100, after: $suites) {
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      id
+      databaseId
+      checkRuns(first: 100, filterBy: {checkType: LATEST}) { ...CheckRuns }
+    }
+  }
+}
+"""
+
+RESOLVE_QUERY = (
+    """
+query(
+  $owner: String!, $repo: String!, $label: String!, $tag: String!, $head: String!, $suites: String
+) {
+  repository(owner: $owner, name: $repo) {
+    label: ref(qualifiedName: $label) { ...Ref }
+    tag: ref(qualifiedName: $tag) { ...Ref }
+    head: ref(qualifiedName: $head) { ...Ref }
+  }
+}
+fragment Ref on Ref {
+  id
+  prefix
+  name
+  target {
+    ...CheckSuites
+    ... on Tag { target { ...CheckSuites } }
+  }
+}
+"""
+    + CHECK_SUITES
+    + CHECK_RUNS
+)
+
+COMMIT_QUERY = (
+    """
+query($owner: String!, $repo: String!, $oid: GitObjectID!, $suites: String) {
+  repository(owner: $owner, name: $repo) {
+    object(oid: $oid) { ...CheckSuites }
+  }
+}
+"""
+    + CHECK_SUITES
+    + CHECK_RUNS
+)
+
+SUITE_QUERY = (
+    """
+query($id: ID!, $runs: String) {
+  node(id: $id) {
+    ... on CheckSuite {
+      checkRuns(first: 100, after: $runs, filterBy: {checkType: LATEST}) { ...CheckRuns }
+    }
+  }
+}
+"""
+    + CHECK_RUNS
+)
+
+
+def query(github: GitHub, document: str, **variables: Any) -> dict:
+    result = github("/graphql", "POST", data={"query": document, "variables": variables})
+    if errs := result.get("errors"):
+        raise errors.GraphQLError(", ".join(error["message"] for error in errs))
+    return result["data"]
+
+
+def resolve(github: GitHub, owner: str, repo: str, label: str) -> tuple[GitRef, list[CheckRun]]:
+    # Resolve the ref as `get_ref` does along all its check runs in a single round-trip
+    label = label.removeprefix("refs/")
+    data = query(
+        github,
+        RESOLVE_QUERY,
+        owner=owner,
+        repo=repo,
+        label=f"refs/{label}",
+        tag=f"refs/tags/{label}",
+        head=f"refs/heads/{label}",
+        suites=None,
+    )
+    repository = data.get("repository") or {}
+    ref = repository.get("label") or repository.get("tag") or repository.get("head")
+    if not ref:
+        raise errors.UnknownRef(f"Ref {label} is unknown")
+    commit = ref["target"]
+    if "target" in commit:  # Annotated tag
+        commit = commit["target"]
+    gitref = {
+        "ref": f"{ref['prefix']}{ref['name']}",
+        "node_id": ref["id"],
+        "url": "",
+        "object": {"sha": commit["oid"], "type": "commit", "url": ""},
+    }
+    checks = list(iter_commit_checks(github, owner, repo, commit))
+    return cast(GitRef, gitref), checks
+
+
+def iter_checks(
+    github: GitHub, owner: str, repo: str, sha: str, check_suite: int | None = None
+) -> Iterator[CheckRun]:
+    data = query(github, COMMIT_QUERY, owner=owner, repo=repo, oid=sha, suites=None)
+    commit = (data.get("repository") or {}).get("object") or {}
+    checks = iter_commit_checks(github, owner, repo, commit)
+    if check_suite:
+        return in_suite(checks, check_suite)
+    return checks
+
+
+def in_suite(checks: Iterator[CheckRun], check_suite: int) -> Iterator[CheckRun]:
+    return (
+        check for check in checks if (suite := check["check_suite"]) and suite["id"] == check_suite
+    )
+
+
+def iter_commit_checks(github: GitHub, owner: str, repo: str, commit: dict) -> Iterator[CheckRun]:
+    suites = commit.get("checkSuites")
+    while suites:
+        for suite in suites["nodes"]:
+            yield from iter_suite_checks(github, suite)
+        if not suites["pageInfo"]["hasNextPage"]:
+            return
+        cursor = suites["pageInfo"]["endCursor"]
+        data = query(github, COMMIT_QUERY, owner=owner, repo=repo, oid=commit["oid"], suites=cursor)
+        suites = data["repository"]["object"]["checkSuites"]
+
+
+def iter_suite_checks(github: GitHub, suite: dict) -> Iterator[CheckRun]:
+    runs = suite["checkRuns"]
+    while True:
+        for run in runs["nodes"]:
+            yield as_check_run(run, suite)
+        if not runs["pageInfo"]["hasNextPage"]:
+            return
+        data = query(github, SUITE_QUERY, id=suite["id"], runs=runs["pageInfo"]["endCursor"])
+        runs = data["node"]["checkRuns"]
+
+
+def as_check_run(run: dict, suite: dict) -> CheckRun:
+    # Same shape as the REST API for the fields the action relies on
+    conclusion = run.get("conclusion")
+    return records.record(
+        run["databaseId"],
+        run["name"],
+        run["status"].lower(),
+        conclusion.lower() if conclusion else None,
+        node_id=run["id"],
+        started_at=run.get("startedAt"),
+        completed_at=run.get("completedAt"),
+        details_url=run.get("detailsUrl"),
+        html_url=run.get("permalink"),
+        suite_id=suite["databaseId"],
+    )
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any, cast
+
+from .types import CheckRun
+
+# The check runs fields the action relies on
+FIELDS = (
+    "id",
+    "node_id",
+    "name",
+    "head_sha",
+    "status",
+    "conclusion",
+    "started_at",
+    "completed_at",
+    "details_url",
+    "html_url",
+    "check_suite",
+)
+
+
+class CheckStatus(StrEnum):
+    QUEUED = "queued"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    WAITING = "waiting"
+    REQUESTED = "requested"
+    PENDING = "pending"
+
+
+class CheckConclusion(StrEnum):
+    SUCCESS = "success"
+    FAILURE = "failure"
+    NEUTRAL = "neutral"
+    CANCELLED = "cancelled"
+    SKIPPED = "skipped"
+    TIMED_OUT = "timed_out"
+    ACTION_REQUIRED = "action_required"
+    STARTUP_FAILURE = "startup_failure"
+    STALE = "stale"
+
+
+# Known values share their enum member (still comparing equal to the string), others are kept
+CODES: dict[str | None, str] = {
+    member.value: member for enum in (CheckStatus, CheckConclusion) for member in enum
+}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CheckRecord(Mapping[str, Any]):
+    # Read-only check run restricted to `FIELDS` without a dict per instance,
+    # kept across polls in place of the full API payloads.
+    # The check suite is reduced to its id and exposed back as `{"id": ...}`.
+    id: int
+    name: str
+    status: str
+    conclusion: str | None = None
+    node_id: str | None = None
+    head_sha: str | None = None
+    started_at: str | None = None
+    completed_at: str | None = None
+    details_url: str | None = None
+    html_url: str | None = None
+    suite_id: int | None = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "check_suite":
+            return None if self.suite_id is None else {"id": self.suite_id}
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+
+def record(
+    id: int, name: str, status: str, conclusion: str | None = None, **fields: Any
+) -> CheckRun:
+    return cast(
+        CheckRun,
+        CheckRecord(
+            id,
+            name,
+            CODES.get(status, status),
+            CODES.get(conclusion, conclusion),
+            **fields,
+        ),
+    )
+
+
+def compact(check: Mapping[str, Any]) -> CheckRun:
+    suite = check.get("check_suite")
+    return record(
+        check["id"],
+        check["name"],
+        check["status"],
+        check.get("conclusion"),
+        node_id=check.get("node_id"),
+        head_sha=check.get("head_sha"),
+        started_at=check.get("started_at"),
+        completed_at=check.get("completed_at"),
+        details_url=check.get("details_url"),
+        html_url=check.get("html_url"),
+        suite_id=suite["id"] if suite else None,
+    )
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from statistics import median
+from time import monotonic
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from .context import Inputs
+    from .types import CheckRun
+
+
+class Scheduler(Protocol):
+    def next_interval(self, checks: list[CheckRun], now: datetime | None = None) -> float: ...
+
+
+class Deadline:
+    # Wall-clock budget for the whole run, immune to system clock adjustments
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout
+        self.start = monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self.start
+
+    @property
+    def remaining(self) -> float:
+        if self.timeout is None:
+            return math.inf
+        return max(0, self.timeout - self.elapsed)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining <= 0
+
+
+def jitter(interval: float, ratio: float = 0.1) -> float:
+    return interval * random.uniform(1 - ratio, 1 + ratio)
+
+
+def parse_date(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def progress(checks: list[CheckRun]) -> frozenset[tuple[int, str]]:
+    return frozenset((check["id"], check["status"]) for check in checks)
+
+
+def estimate_eta(checks: list[CheckRun], now: datetime) -> float | None:
+    # Seconds before the next running check completes, expecting the median completed duration
+    durations = [
+        (completed_at - started_at).total_seconds()
+        for check in checks
+        if check["status"] == "completed"
+        and (started_at := parse_date(check["started_at"]))
+        and (completed_at := parse_date(check["completed_at"]))
+    ]
+    started = [
+        started_at
+        for check in checks
+        if check["status"] == "in_progress" and (started_at := parse_date(check["started_at"]))
+    ]
+    if not durations or not started:
+        return None
+    expected = median(durations)
+    return min((started_at - now).total_seconds() + expected for started_at in started)
+
+
+@dataclass
+class Fixed:
+    interval: float
+
+    def next_interval(self, checks: list[CheckRun], now: datetime | None = None) -> float:
+        return self.interval
+
+
+@dataclass
+class Backoff:
+    min_interval: float
+    max_interval: float
+    factor: float = 2
+    attempt: int = 0
+    last_progress: frozenset[tuple[int, str]] = field(default_factory=frozenset)
+
+    def next_interval(self, checks: list[CheckRun], now: datetime | None = None) -> float:
+        # Something moved since last poll: things are likely to change soon
+        if (current := progress(checks)) != self.last_progress:
+            self.attempt, self.last_progress = 0, current
+        interval = self.min_interval * self.factor**self.attempt
+        self.attempt += 1
+        return self.clamp(jitter(interval))
+
+    def clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+
+@dataclass
+class Adaptive(Backoff):
+    def next_interval(self, checks: list[CheckRun], now: datetime | None = None) -> float:
+        now = now or datetime.now(UTC)
+        if not any(check["status"] == "in_progress" for check in checks):
+            # Nothing is running yet, queue time is unpredictable
+            return super().next_interval(checks, now)
+        if (eta := estimate_eta(checks, now)) is None:
+            return super().next_interval(checks, now)
+        # Fast-poll window: wake up right after the next expected completion
+        self.attempt, self.last_progress = 0, progress(checks)
+        return self.clamp(jitter(max(eta, 0)))
+
+
+def for_inputs(inputs: Inputs) -> Scheduler:
+    if inputs.wait_mode == "webhook":
+        # Events wake up the wait loop, polling is only a safety net for missed deliveries
+        return Fixed(inputs.max_interval)
+    match inputs.wait_strategy:
+        case "backoff":
+            return Backoff(inputs.min_interval, inputs.max_interval)
+        case "adaptive":
+            return Adaptive(inputs.min_interval, inputs.max_interval)
+        case _:
+            return Fixed(inputs.wait_interval)
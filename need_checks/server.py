@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.client import HTTPException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Event, Thread
+from time import monotonic
+from typing import Any, cast
+from urllib.error import HTTPError
+
+import click
+
+from . import action, client, errors, scheduler
+from .client import GitHub
+from .context import Context, Inputs, Target
+from .types import CheckRun, GitRef, Job
+
+DEFAULT_PORT = 8765
+
+type CommitKey = tuple[str, str, int | None, str, bool]  # type: ignore[valid-type]
+
+
+def context(inputs: Inputs) -> Context:
+    # Checks are fetched and decided upon from the inputs alone, the job runs elsewhere
+    return Context.model_construct(inputs=inputs, github=None, runner=None)  # type: ignore[arg-type]
+
+
+def retryable(error: Exception) -> bool:
+    # Left to the next poll once the client retries are exhausted, unlike permanent failures
+    if isinstance(error, HTTPError) and client.retry_after(error) is not None:
+        return True
+    return client.is_transient(error) or isinstance(error, errors.RateLimited)
+
+
+@dataclass
+class Waiter:
+    # A job waiting for a verdict on one of its targets
+    inputs: Inputs
+    job: str | None
+    notify: Event
+    deadline: scheduler.Deadline
+    conclusion: action.Conclusion = action.Conclusion.WAIT
+    checks: list[CheckRun] = field(default_factory=list)
+    done: bool = False
+    error: str | None = None
+
+
+@dataclass
+class Commit:
+    # Checks of a commit, polled once for all the jobs waiting on it
+    key: CommitKey
+    target: Target
+    ref: GitRef
+    check_suite: int | None
+    inputs: Inputs  # Fetching inputs, without the waiters filters
+    poll: scheduler.Scheduler
+    waiters: list[Waiter] = field(default_factory=list)
+    next_poll: float = 0
+
+
+class Hub:
+    def __init__(self, github: GitHub):
+        self.github = github
+        self.commits: dict[CommitKey, Commit] = {}
+        self.condition = Condition()
+        self.running = True
+
+    def subscribe(self, target: Target, inputs: Inputs, job: str | None, notify: Event) -> Waiter:
+        ref = action.get_ref(self.github, target.owner, target.repo, target.ref)
+        check_suite = None
+        if inputs.workflow:
+            check_suite = action.get_check_suite(self.github, target, ref, inputs.workflow)
+        key = (target.repository, ref["object"]["sha"], check_suite, inputs.api, inputs.statuses)
+        waiter = Waiter(inputs, job, notify, scheduler.Deadline(inputs.wait_timeout or None))
+        with self.condition:
+            if (commit := self.commits.get(key)) is None:
+                fetching = inputs.model_copy(update={"include": []})
+                poll = scheduler.for_inputs(inputs)
+                commit = self.commits[key] = Commit(key, target, ref, check_suite, fetching, poll)
+            commit.waiters.append(waiter)
+            self.condition.notify()
+        return waiter
+
+    def unsubscribe(self, waiters: list[Waiter]):
+        with self.condition:
+            for commit in list(self.commits.values()):
+                commit.waiters = [waiter for waiter in commit.waiters if waiter not in waiters]
+                if not commit.waiters:
+                    del self.commits[commit.key]
+
+    def serve_forever(self):
+        while self.running:
+            with self.condition:
+                now = monotonic()
+                due = [commit for commit in self.commits.values() if commit.next_poll <= now]
+            for commit in due:
+                self.poll(commit)
+            with self.condition:
+                self.condition.wait(self.next_poll())
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def next_poll(self) -> float | None:
+        if not self.commits:
+            return None
+        return max(0, min(commit.next_poll for commit in self.commits.values()) - monotonic())
+
+    def poll(self, commit: Commit):
+        requests = self.github.requests
+        try:
+            checks = list(
+                action.iter_checks(
+                    self.github,
+                    context(commit.inputs),
+                    commit.ref,
+                    commit.check_suite,
+                    commit.target,
+                )
+            )
+        except Exception as error:  # Keep serving the other commits
+            print(f"⚠️ Unable to poll {commit.target}: {error}")
+            if not retryable(error):
+                self.fail(commit, error)
+                return
+            checks = None  # Retried on next poll
+        with self.condition:
+            for waiter in commit.waiters:
+                if checks is not None:
+                    self.decide(waiter, commit, checks)
+                if waiter.conclusion != action.Conclusion.WAIT or waiter.deadline.expired:
+                    waiter.done = True
+                    waiter.notify.set()
+            interval = commit.poll.next_interval(checks or [])
+            paced = self.github.pace(self.github.requests - requests)
+            commit.next_poll = monotonic() + max(interval, paced)
+
+    def fail(self, commit: Commit, error: Exception):
+        # The waiters would otherwise wait for ever, or their timeout
+        with self.condition:
+            self.commits.pop(commit.key, None)
+            for waiter in commit.waiters:
+                waiter.error = f"Unable to poll {commit.target}: {error}"
+                waiter.done = True
+                waiter.notify.set()
+
+    def decide(self, waiter: Waiter, commit: Commit, checks: list[CheckRun]):
+        ctx = context(waiter.inputs)
+        job = cast(Job, {"name": waiter.job})
+        waiter.checks = action.select_checks(self.github, ctx, commit.ref, job, checks=checks)
+        waiter.conclusion = action.decide_for_checks(ctx, waiter.checks)
+
+    def wait(self, targets: list[Target], inputs: Inputs, job: str | None) -> dict[str, Any]:
+        # Verdict over all the targets, as soon as it can't change anymore
+        notify = Event()
+        waiters: list[Waiter] = []
+        try:
+            for target in targets:
+                waiters.append(self.subscribe(target, inputs, job, notify))
+            while True:
+                with self.condition:
+                    conclusions = [waiter.conclusion for waiter in waiters]
+                    finished = all(waiter.done for waiter in waiters)
+                conclusion = action.aggregate(context(inputs), conclusions)
+                if conclusion != action.Conclusion.WAIT or finished:
+                    break
+                notify.wait()
+                notify.clear()
+        finally:
+            self.unsubscribe(waiters)
+        if failed := next((waiter.error for waiter in waiters if waiter.error), None):
+            raise errors.PollFailed(failed)
+        checks = [check for waiter in waiters for check in waiter.checks]
+        match conclusion:
+            case action.Conclusion.OK:
+                message = "All checks met the requirements"
+            case action.Conclusion.KO:
+                message = str(action.unmet_requirements(context(inputs), checks))
+            case _:
+                message = f"Timeout reached after waiting for {waiters[0].deadline.elapsed:.0f}s"
+        return {"conclusion": conclusion.value, "message": message, "checks": checks}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Server
+
+    def do_POST(self):
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+            inputs = Inputs(**request.get("inputs", {}))
+            verdict = self.server.hub.wait(inputs.all_targets, inputs, request.get("job"))
+        except errors.PollFailed as error:
+            self.respond(HTTPStatus.BAD_GATEWAY, {"message": str(error)})
+        except errors.ActionError as error:
+            self.respond(HTTPStatus.UNPROCESSABLE_ENTITY, {"message": str(error)})
+        except (OSError, HTTPException) as error:  # API or network failure, `URLError` included
+            self.respond(HTTPStatus.BAD_GATEWAY, {"message": f"GitHub API failure: {error}"})
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            self.respond(HTTPStatus.BAD_REQUEST, {"message": str(error)})
+        else:
+            self.respond(HTTPStatus.OK, verdict)
+
+    def respond(self, status: HTTPStatus, payload: dict[str, Any]):
+        body = json.dumps(payload, default=dict).encode()  # Check records are mappings
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    # Jobs block on `POST /` until a verdict, each commit being polled once for all of them
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], hub: Hub):
+        super().__init__(address, Handler)
+        self.hub = hub
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        poller = Thread(target=self.hub.serve_forever, daemon=True)
+        poller.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self.hub.shutdown()
+            poller.join()
+
+
+@click.command
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=DEFAULT_PORT, show_default=True)
+@click.option("--token", envvar=["INPUT_TOKEN", "GITHUB_TOKEN"], default="")
+def __main__(host: str, port: int, token: str):
+    server = Server((host, port), Hub(GitHub(token=token or None)))
+    print(f"📡 Serving need-checks on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
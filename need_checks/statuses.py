@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+
+from . import records
+from .types import CheckRun, CommitStatus
+
+# Check run status and conclusion of each commit status state
+STATES: dict[str, tuple[str, str | None]] = {
+    "pending": ("in_progress", None),
+    "success": ("completed", "success"),
+    "failure": ("completed", "failure"),
+    "error": ("completed", "failure"),
+}
+
+
+def merge(
+    checks: Iterable[CheckRun], statuses: Callable[[], Iterable[CommitStatus]]
+) -> Iterator[CheckRun]:
+    # Check runs first, then statuses once per context unless also reported as a check run
+    names: set[str] = set()
+    for check in checks:
+        names.add(check["name"])
+        yield check
+    for status in statuses():
+        if status["context"] not in names:
+            names.add(status["context"])
+            yield as_check_run(status)
+
+
+def as_check_run(status: CommitStatus) -> CheckRun:
+    # Same shape as the REST API for the fields the action relies on
+    state, conclusion = STATES[status["state"]]
+    return records.record(
+        status["id"],
+        status["context"],
+        state,
+        conclusion,
+        node_id=status["node_id"],
+        started_at=status["created_at"],
+        completed_at=status["updated_at"] if conclusion else None,
+        details_url=status["target_url"],
+        html_url=status["target_url"],
+    )
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import base64
+from collections import defaultdict
+from collections.abc import Callable
+from http import HTTPStatus
+from http.client import HTTPConnection, HTTPException, HTTPResponse, HTTPSConnection
+from io import BytesIO
+from threading import Lock
+from typing import Any, Protocol
+from urllib.error import HTTPError
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import Request, getproxies, proxy_bypass
+
+from . import __version__
+
+type Origin = tuple[str, str]  # type: ignore[valid-type]
+
+USER_AGENT = f"need-checks/{__version__}"
+MAX_REDIRECTS = 5
+REDIRECTS = (
+    HTTPStatus.MOVED_PERMANENTLY,
+    HTTPStatus.FOUND,
+    HTTPStatus.TEMPORARY_REDIRECT,
+    HTTPStatus.PERMANENT_REDIRECT,
+)
+# Errors meaning the server closed an idle keep-alive connection
+STALE_CONNECTION_ERRORS = (ConnectionResetError, BrokenPipeError, HTTPException)
+
+
+class Transport(Protocol):
+    def __call__(self, request: Request, timeout: float | None = None, **kwargs: Any) -> Any: ...
+
+
+class PooledResponse:
+    # Give the connection back to the pool once the body has been fully read
+    def __init__(self, response: HTTPResponse, release: Callable[[], None]):
+        self.response = response
+        self.release = release
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, *args) -> bytes:
+        data = self.response.read(*args)
+        if self.response.isclosed():
+            self.close()
+        return data
+
+    def close(self):
+        if release := self.release:
+            self.release = None  # type: ignore[assignment]
+            self.response.close()
+            release()
+
+    def __enter__(self) -> PooledResponse:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConnectionPool:
+    # Keep-alive HTTP/1.1 connections reused per origin, saving a TCP and TLS handshake per call
+    def __init__(self, maxsize: int = 10):
+        self.maxsize = maxsize
+        self.idle: dict[Origin, list[HTTPConnection]] = defaultdict(list)
+        self.lock = Lock()
+
+    def urlopen(self, request: Request, timeout: float | None = None, **kwargs) -> PooledResponse:
+        for _ in range(MAX_REDIRECTS):
+            response = self.send(request, timeout)
+            location = response.headers.get("Location")
+            if response.status not in REDIRECTS or not location:
+                break
+            response.read()
+            url = urljoin(request.full_url, location)
+            request = Request(
+                url, request.data, dict(request.header_items()), method=request.get_method()
+            )
+        if response.status >= HTTPStatus.BAD_REQUEST or response.status == HTTPStatus.NOT_MODIFIED:
+            body = BytesIO(response.read())  # Release the connection
+            raise HTTPError(
+                request.full_url, response.status, response.reason, response.headers, body
+            )
+        return response
+
+    def send(self, request: Request, timeout: float | None) -> PooledResponse:
+        origin = (request.type, request.host)
+        headers = {"User-Agent": USER_AGENT, **dict(request.header_items())}
+        if request.data is not None and not request.has_header("Content-type"):
+            headers["Content-Type"] = "application/json"
+        while True:
+            connection, reused = self.acquire(origin)
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            try:
+                connection.request(
+                    request.get_method(), request.selector, body=request.data, headers=headers
+                )
+                response = connection.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused:
+                    continue  # Retry on a fresh connection
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            return PooledResponse(response, lambda: self.release(origin, connection, response))
+
+    def acquire(self, origin: Origin) -> tuple[HTTPConnection, bool]:
+        with self.lock:
+            if idle := self.idle[origin]:
+                return idle.pop(), True
+        return connect(*origin), False
+
+    def release(self, origin: Origin, connection: HTTPConnection, response: HTTPResponse):
+        if response.will_close:
+            connection.close()
+            return
+        with self.lock:
+            if len(idle := self.idle[origin]) < self.maxsize:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+
+def connect(scheme: str, host: str) -> HTTPConnection:
+    cls = HTTPSConnection if scheme == "https" else HTTPConnection
+    if not (proxy := getproxies().get(scheme)) or proxy_bypass(host):
+        return cls(host)
+    # Tunnel through the proxy like urllib does
+    url = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    connection = cls(url.hostname or "", url.port)
+    headers = {}
+    if url.username:
+        credentials = f"{unquote(url.username)}:{unquote(url.password or '')}"
+        headers["Proxy-Authorization"] = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+    connection.set_tunnel(host, headers=headers)
+    return connection
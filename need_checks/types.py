@@ -156,10 +156,26 @@ class CheckRun(Node):
     deployment: NotRequired[Deployment]
 
 
+class CommitStatus(Node, Timestamped):
+    url: str
+    avatar_url: str | None
+    state: Literal["error", "failure", "pending", "success"]
+    description: str | None
+    target_url: str | None
+    context: str
+    creator: User | None
+
+
 class ResultList(TypedDict):
     total_count: int
 
 
+class CombinedStatus(ResultList):
+    state: Literal["failure", "pending", "success"]
+    sha: str
+    statuses: list[CommitStatus]
+
+
 class CheckRunList(ResultList):
     check_runs: list[CheckRun]
 
@@ -341,6 +357,12 @@ type Conclusion = Literal[  # type: ignore[valid-type]
     "stale",
 ]
 
+type WaitStrategy = Literal["fixed", "backoff", "adaptive"]  # type: ignore[valid-type]
+
+type Api = Literal["rest", "graphql"]  # type: ignore[valid-type]
+
+type WaitMode = Literal["poll", "webhook"]  # type: ignore[valid-type]
+
 type Status = Literal["queued", "in_progress", "completed"]  # type: ignore[valid-type]
 
 type JobStatus = Status | Literal["waiting"]  # type: ignore[valid-type]
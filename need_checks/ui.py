@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from math import ceil
+from typing import TYPE_CHECKING
+
 import click
 
 from .context import Context
 from .types import CheckRun, GitRef
 
+if TYPE_CHECKING:
+    from .client import RateLimit
+
 
 def header(logo: str, text: str) -> str:
     return f"{logo} {bold(text)}"
@@ -38,6 +44,8 @@ def display_inputs(label: str, ctx: Context):
     for name, value in ctx.inputs.model_dump().items():
         if name == "token":
             value = f"{value[:3]}**********{value[-3:]}"  # Don't leak credentials
+        elif name == "webhook_secret" and value:
+            value = "**********"  # Not even a part, unlike the recognizable token prefix
         print(f"  {white(name)}: {value}")
 
 
@@ -61,7 +69,31 @@ def conclusion_icon(status: str) -> str:
             return "❓"
 
 
-def display_checks(label: str, checks: list[CheckRun]):
+def display_checks(label: str, checks: list[CheckRun] | dict[str, list[CheckRun]]):
     print(header("📃", label))
-    for check in checks:
-        print(f"  {conclusion_icon(check.get('conclusion') or '')} {white(check['name'])}")
+    match checks:
+        case dict():
+            # Breakdown per target
+            for target, target_checks in checks.items():
+                completed = sum(check["status"] == "completed" for check in target_checks)
+                print(f"  🎯 {white(target)} ({completed}/{len(target_checks)} completed)")
+                for check in target_checks:
+                    print(f"    {check_line(check)}")
+        case _:
+            for check in checks:
+                print(f"  {check_line(check)}")
+
+
+def check_line(check: CheckRun) -> str:
+    return f"{conclusion_icon(check.get('conclusion') or '')} {white(check['name'])}"
+
+
+def display_rate_limit(rate_limit: RateLimit | None):
+    if rate_limit is None:
+        return
+    icon = "🐢" if rate_limit.low else "🚦"
+    budget = f"{rate_limit.remaining}/{rate_limit.limit}"
+    reset = f"reset in {ceil(rate_limit.resets_in / 60)} min"
+    print(
+        f"{icon} {bold('API rate limit')}: {budget} {rate_limit.resource} requests left ({reset})"
+    )
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Thread
+from typing import TYPE_CHECKING, Any
+from urllib.request import Request, urlopen
+
+from . import records
+
+if TYPE_CHECKING:
+    from .context import Context
+    from .types import CheckRun
+
+SIGNATURE_HEADER = "X-Hub-Signature-256"
+EVENT_HEADER = "X-GitHub-Event"
+
+
+def sign(secret: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    if not secret:
+        return True
+    return signature is not None and hmac.compare_digest(sign(secret, body), signature)
+
+
+class CheckTable:
+    # Latest known state of the checks of the awaited commits, keyed by `CheckRun.id`.
+    # API polls replace it, webhook events update it in between and wake up waiters.
+    def __init__(self, targets: dict[str, int | None]):
+        self.targets = targets  # Check suite (if restricted to a workflow) by commit sha
+        self.checks: dict[str, dict[int, CheckRun]] = {}
+        self.stale: set[str] = set()
+        self.version = 0
+        self.condition = Condition()
+
+    def reset(self, sha: str, checks: Iterable[CheckRun]) -> int:
+        with self.condition:
+            self.checks[sha] = {check["id"]: check for check in checks}
+            self.stale.discard(sha)
+            return self.version
+
+    def apply(self, event: str, payload: dict[str, Any]):
+        match event:
+            case "check_run":
+                check = payload["check_run"]
+                if (sha := check["head_sha"]) not in self.targets:
+                    return
+                suite = check.get("check_suite") or {}
+                if (check_suite := self.targets[sha]) and suite.get("id") != check_suite:
+                    return
+                with self.condition:
+                    self.update(self.checks.setdefault(sha, {}), records.compact(check))
+            case "check_suite":
+                # Suite events don't carry the check runs: they need to be fetched again
+                self.invalidate(payload["check_suite"]["head_sha"])
+            case "status":
+                self.invalidate(payload["sha"])
+
+    def update(self, checks: dict[int, CheckRun], check: CheckRun):
+        # A re-run is a new check run: it supersedes the previous runs of the same check,
+        # as the API `latest` filter does
+        runs = [
+            other
+            for other in checks.values()
+            if other["name"] == check["name"] and other["check_suite"] == check["check_suite"]
+        ]
+        if any(other["id"] > check["id"] for other in runs):
+            return  # A late event of a superseded run
+        for other in runs:
+            del checks[other["id"]]
+        checks[check["id"]] = check
+        self.notify()
+
+    def invalidate(self, sha: str):
+        if sha not in self.targets:
+            return
+        with self.condition:
+            self.stale.add(sha)
+            self.notify()
+
+    def notify(self):
+        self.version += 1
+        self.condition.notify_all()
+
+    def interrupt(self):
+        with self.condition:
+            self.notify()
+
+    def snapshot(self, sha: str) -> list[CheckRun] | None:
+        # Known checks of a commit, or `None` if they must be fetched from the API
+        with self.condition:
+            if sha in self.stale:
+                return None
+            return list(self.checks.get(sha, {}).values())
+
+    def wait(self, version: int, timeout: float) -> bool:
+        # Whether checks have been updated since `version`
+        with self.condition:
+            return self.condition.wait_for(lambda: self.version > version, timeout)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Receiver
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not verify_signature(self.server.secret, body, self.headers.get(SIGNATURE_HEADER)):
+            self.send_response(HTTPStatus.UNAUTHORIZED)
+        else:
+            try:
+                payload = json.loads(body)
+                self.server.table.apply(self.headers.get(EVENT_HEADER, ""), payload)
+            except (ValueError, KeyError, TypeError):
+                self.send_response(HTTPStatus.BAD_REQUEST)
+            else:
+                self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class Receiver(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], table: CheckTable, secret: str = ""):
+        super().__init__(address, Handler)
+        self.table = table
+        self.secret = secret
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+
+@contextmanager
+def receive(ctx: Context, targets: dict[str, int | None]) -> Iterator[CheckTable | None]:
+    if ctx.inputs.wait_mode != "webhook":
+        yield None
+        return
+    table = CheckTable(targets)
+    receiver = Receiver(("", ctx.inputs.webhook_port), table, ctx.inputs.webhook_secret)
+    thread = Thread(target=receiver.serve_forever, daemon=True)
+    thread.start()
+    print(f"📡 Listening for check webhooks on port {receiver.server_address[1]}")
+    try:
+        yield table
+    finally:
+        receiver.shutdown()
+        receiver.server_close()
+
+
+def send(url: str, event: str, payload: dict[str, Any], secret: str = "", timeout: float = 5):
+    # Local stand-in for GitHub webhook deliveries
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json", EVENT_HEADER: event}
+    if secret:
+        headers[SIGNATURE_HEADER] = sign(secret, body)
+    with urlopen(Request(url, body, headers, method="POST"), timeout=timeout) as response:
+        return response.status
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterator
+
+# A block mapping key with an optional inline scalar value
+KEY = re.compile(
+    r"^(?P<indent> *)(?P<key>[\w.-]+|\"[^\"\\]*\"|'[^']*')[ \t]*:(?:[ \t]+(?P<value>.*))?$"
+)
+# Values needing a full YAML parser: flow collections, block scalars, anchors, aliases and tags
+COMPLEX = re.compile(r"^[{\[|>&*!]")
+
+# Indentation, key and inline value of a block mapping entry
+type Entry = tuple[int, str, str | None]  # type: ignore[valid-type]
+
+
+class Unsupported(Exception):
+    pass
+
+
+def parse(content: str) -> dict:
+    # Only the workflow name and the jobs names are relevant, skip the full strictyaml parse
+    try:
+        return scan(content)
+    except Unsupported:
+        import strictyaml  # Slow to import, only needed for workflows the scan can't handle
+
+        return strictyaml.load(content).data
+
+
+def scan(content: str) -> dict:
+    # Line based scan of the top-level `name` and the `jobs.<id>.name` keys
+    workflow: dict = {}
+    section = None
+    jobs: list[Entry] = []
+    for indent, key, value in entries(content.removeprefix("\ufeff")):
+        if indent == 0:
+            section = key
+            if key == "name":
+                workflow["name"] = name_of(value)
+            elif key == "jobs" and value_of(value):
+                raise Unsupported("Inline jobs")
+        elif section == "jobs":
+            jobs.append((indent, key, value))
+    if section is None:
+        raise Unsupported("No top-level key")
+    if jobs:
+        workflow["jobs"] = scan_jobs(jobs)
+    return workflow
+
+
+def entries(content: str) -> Iterator[Entry]:
+    name_indent = None
+    for number, line in enumerate(content.splitlines()):
+        if not (stripped := line.strip()) or stripped.startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        if line[indent] == "\t":
+            raise Unsupported("Tab indentation")
+        if stripped in ("---", "..."):
+            if number and stripped == "---":
+                raise Unsupported("Multiple documents")
+            continue
+        if name_indent is not None and indent > name_indent:
+            raise Unsupported("Multi-line name")
+        name_indent = None
+        if match := KEY.match(line):  # Not sequence items nor multi-line scalars
+            key, value = unquote(match["key"]), match["value"]
+            if key == "name" and value:
+                name_indent = indent
+            yield indent, key, value
+
+
+def scan_jobs(entries: list[Entry]) -> dict[str, dict[str, str]]:
+    jobs: dict[str, dict[str, str]] = {}
+    job: dict[str, str] = {}
+    job_indent, name_indent = entries[0][0], None
+    for indent, key, value in entries:
+        if indent < job_indent:
+            raise Unsupported("Inconsistent indentation")
+        if indent == job_indent:
+            if value_of(value):
+                raise Unsupported("Inline job")
+            job = jobs[key] = {}
+            name_indent = None
+            continue
+        if name_indent is None:
+            name_indent = indent
+        if indent == name_indent and key == "name":
+            job["name"] = name_of(value)
+    return jobs
+
+
+def name_of(value: str | None) -> str:
+    if not (name := value_of(value)):
+        raise Unsupported("Name on the following lines")
+    return name
+
+
+def value_of(value: str | None) -> str:
+    if value is None:
+        return ""
+    value = value.strip()
+    if value.startswith("#"):
+        return ""
+    if COMPLEX.match(value):
+        raise Unsupported(f"Complex value: {value}")
+    if value.startswith('"'):
+        end = value.find('"', 1)
+        if end < 0 or "\\" in value[:end]:
+            raise Unsupported(f"Complex double-quoted value: {value}")
+        return value[1:end]
+    if value.startswith("'"):
+        if not (match := re.match(r"'((?:[^']|'')*)'", value)):
+            raise Unsupported(f"Multi-line single-quoted value: {value}")
+        return match[1].replace("''", "'")
+    # Plain scalar, up to an eventual comment
+    return re.split(r"[ \t]#", value, maxsplit=1)[0].rstrip()
+
+
+def unquote(key: str) -> str:
+    if key[0] in "\"'":
+        return key[1:-1]
+    return key
@@ -0,0 +1,73 @@
+import json
+import sys
+import tracemalloc
+from collections.abc import Callable
+from timeit import timeit
+from typing import Any
+
+from need_checks import records
+
+CHECKS = 1000
+CHECK = """\
+{{
+  "id": {index},
+  "node_id": "CR_kwDOABCDEF{index:08d}",
+  "head_sha": "ce587453ced02b1526dfb4cb910479d431683101",
+  "external_id": "",
+  "url": "https://api.github.com/repos/owner/repo/check-runs/{index}",
+  "html_url": "https://github.com/owner/repo/runs/{index}",
+  "details_url": "https://github.com/owner/repo/actions/runs/1/job/{index}",
+  "status": "completed",
+  "conclusion": "success",
+  "started_at": "2024-02-01T10:00:00Z",
+  "completed_at": "2024-02-01T10:05:00Z",
+  "output": {{"title": null, "summary": null, "text": null, "annotations_count": 0,
+    "annotations_url": "https://api.github.com/repos/owner/repo/check-runs/{index}/annotations"}},
+  "name": "Job {index}",
+  "check_suite": {{"id": 1}},
+  "app": {{"id": 15368, "slug": "github-actions", "node_id": "MDM6QXBwMTUzNjg=",
+    "owner": {{"login": "github", "id": 9919, "type": "Organization", "site_admin": false}},
+    "name": "GitHub Actions", "description": "Automate your workflow",
+    "external_url": "https://help.github.com/en/actions",
+    "html_url": "https://github.com/apps/github-actions",
+    "created_at": "2018-07-30T09:30:17Z", "updated_at": "2019-12-10T19:04:12Z",
+    "permissions": {{"actions": "write", "checks": "write", "contents": "write"}},
+    "events": ["check_run", "check_suite", "pull_request", "push"]}},
+  "pull_requests": []
+}}"""
+
+
+def generate(checks: int) -> str:
+    runs = ",".join(CHECK.format(index=i) for i in range(checks))
+    return f'{{"total_count": {checks}, "check_runs": [{runs}]}}'
+
+
+def retained(build: Callable[[str], Any], body: str) -> int:
+    # Memory still held once built, as when kept between polls
+    tracemalloc.start()
+    kept = build(body)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def payloads(body: str) -> list:
+    return json.loads(body)["check_runs"]
+
+
+def compacted(body: str) -> list:
+    return [records.compact(check) for check in payloads(body)]
+
+
+def __main__():
+    body = generate(int(sys.argv[1]) if len(sys.argv) > 1 else CHECKS)
+    print(f"{len(payloads(body))} check runs, {len(body) / 1024:.0f} KiB of JSON")
+    for name, build in (("payloads", payloads), ("records", compacted)):
+        size = retained(build, body)
+        duration = timeit(lambda: build(body), number=10) / 10
+        print(f"{name:>10}: {size / 1024:8.0f} KiB retained, {duration * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,38 @@
+import re
+import subprocess
+import sys
+
+MODULE = "need_checks.action"
+TOP = 15
+# In microseconds, every action run pays it: about 420 ms measured on a developer machine.
+# Wall-clock dependent, so checked on demand rather than by the test suite.
+BUDGET = 500_000
+IMPORTTIME = re.compile(r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| (?P<name>.+)$")
+
+
+def importtime(module: str = MODULE) -> dict[str, int]:
+    # Cumulative import duration (in microseconds) of each module, in a fresh interpreter
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        match["name"].strip(): int(match["cumulative"])
+        for line in result.stderr.splitlines()
+        if (match := IMPORTTIME.match(line))
+    }
+
+
+def __main__():
+    module = sys.argv[1] if len(sys.argv) > 1 else MODULE
+    timings = importtime(module)
+    for name, duration in sorted(timings.items(), key=lambda item: item[1], reverse=True)[:TOP]:
+        print(f"{duration / 1000:8.1f} ms  {name}")
+    if module == MODULE and timings[MODULE] > BUDGET:
+        sys.exit(f"{MODULE} import is over the {BUDGET / 1000:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    __main__()
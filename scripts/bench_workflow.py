@@ -0,0 +1,49 @@
+import sys
+from timeit import timeit
+
+import strictyaml
+
+from need_checks import workflow
+
+JOBS = 100
+JOB = """\
+  job-{index}:
+    name: Job {index}
+    runs-on: ${{{{ matrix.os }}}}
+    strategy:
+      matrix:
+        os:
+          - ubuntu-latest
+          - windows-latest
+    steps:
+      - uses: actions/checkout@v4
+      - name: Install
+        run: pdm install
+      - name: Test
+        run: |
+          pdm test --cov
+          pdm cov
+"""
+
+
+def generate(jobs: int) -> str:
+    return "name: Benchmark\non: push\njobs:\n" + "".join(JOB.format(index=i) for i in range(jobs))
+
+
+def __main__():
+    content = generate(int(sys.argv[1]) if len(sys.argv) > 1 else JOBS)
+    assert workflow.scan(content)["jobs"] == {
+        job: {"name": jobdef["name"]}
+        for job, jobdef in strictyaml.load(content).data["jobs"].items()
+    }
+    print(f"Workflow of {len(content.splitlines())} lines")
+    for name, parse, number in (
+        ("strictyaml", lambda: strictyaml.load(content), 3),
+        ("scan", lambda: workflow.scan(content), 100),
+    ):
+        duration = timeit(parse, number=number) / number
+        print(f"{name:>10}: {duration * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    __main__()
@@ -1,21 +1,25 @@
 from __future__ import annotations
 
 import json
+from base64 import b64encode
 from dataclasses import dataclass
+from http import HTTPStatus
 from http.client import HTTPMessage, HTTPResponse
-from io import StringIO
+from io import BytesIO
 from typing import TYPE_CHECKING, Any, Protocol
+from urllib.error import HTTPError
 from urllib.parse import quote_plus
 
 import pytest
-from fastcore.net import ExceptionsHTTP
-from ghapi.all import GhApi
+from ghapi.core import GhApi
 
+from need_checks.client import GitHub
 from need_checks.context import Context
-from need_checks.types import CheckRunList, Job, JobList, WorkflowRun, WorkflowRunList
-from tests.factories import CheckRunFactory, JobFactory, WorkflowRunFactory
+from need_checks.types import Job, WorkflowRun, WorkflowRunList
+from tests.factories import CheckRunFactory, ContentFactory, JobFactory, WorkflowRunFactory
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
     from urllib.request import Request
 
@@ -48,33 +52,50 @@ class MockGhApi:
     ) -> None:
         print(f"GhApi, {args=}, {kwargs=}, {owner=}, {repo=}")
         self.mocker = mocker
-        self.mocker.patch("fastcore.net.urlopen", wraps=self.mock_urlopen)
-        self.api = GhApi(*args, **kwargs)
+        self.urlopen = self.mocker.patch(
+            "need_checks.transport.ConnectionPool.urlopen", wraps=self.mock_urlopen
+        )
+        self.api = GitHub(*args, **kwargs)
+        self.meta = GhApi(authenticate=False)  # Endpoints definitions only
         self.responses: dict[Endpoint, Any] = {}
         self.calls: dict[Endpoint, list[Any]] = {}
+        self.unexpected: list[Endpoint] = []  # Even if swallowed, like in worker threads
         self.owner = owner
         self.repo = repo
 
     def __getattr__(self, name):
-        if not (group := self.api.groups.get(name)):
+        if not (group := self.meta.groups.get(name)):
             raise AttributeError(f"GhApi.{name} group not found")
         return MockVerbGroup(self, group)
 
+    def graphql(self, *responses: dict | Exception):
+        self.responses[("POST", f"{self.api.gh_host}/graphql")] = list(responses)
+
+    @property
+    def graphql_calls(self) -> list[dict]:
+        calls = self.calls.get(("POST", f"{self.api.gh_host}/graphql"), [])
+        return [json.loads(request.data) for request, _ in calls]
+
     def mock_urlopen(self, request: Request, **kwargs):
         endpoint = (str(request.method), str(request.full_url))
 
         if (expected := self.responses.get(endpoint)) is None:
+            self.unexpected.append(endpoint)
             raise ValueError(f"Unexpected GhApi call: {request.method} {request.full_url}")
 
         response = HTTPResponse(self.mocker.Mock())
         headers = {}
 
+        nb_calls = len(self.calls.get(endpoint, []))
         match expected:
             case tuple((list(responses), dict(hds))):
-                expected = responses[len(self.calls)]
+                expected = responses[nb_calls]
                 headers = hds
             case list():
-                expected = expected[len(self.calls)]
+                expected = expected[nb_calls]
+        match expected:
+            case tuple(((dict() | Exception()) as data, dict(hds))):
+                expected, headers = data, hds
 
         mock_args: dict[str, Any] = {}
         match expected:
@@ -132,24 +153,69 @@ class MockVerbCall:
         url = f"{self.mock.api.gh_host}{path}"
         if any(p in self.kwargs for p in self.verb.params):
             qs = "&".join(
-                f"{p}={quote_plus(self.kwargs[p])}" for p in self.verb.params if p in self.kwargs
+                f"{p}={quote_plus(str(self.kwargs[p]))}"
+                for p in self.verb.params
+                if p in self.kwargs
             )
             url = "?".join((url, qs))
         return (self.verb.verb.upper(), url)
 
-    def returns(self, data):
-        self.mock.responses[self.endpoint] = data
+    def returns(self, data, headers: dict[str, str] | None = None):
+        self.mock.responses[self.endpoint] = (data, headers) if headers else data
 
-    def error(self, code: int, message: str | None = None):
-        cls = ExceptionsHTTP[code]
-        url = self.endpoint[1]
-        error = cls(url, {}, StringIO(), msg=message)
-        self.mock.responses[self.endpoint] = error
+    def paginated(self, key: str, items: list, per_page: int = 100):
+        pages = [items[i : i + per_page] for i in range(0, len(items), per_page)] or [[]]
+        for page, chunk in enumerate(pages, 1):
+            self.kwargs.update(per_page=per_page, page=page)
+            self.returns({"total_count": len(items), key: chunk})
+
+    @property
+    def called(self) -> bool:
+        return self.endpoint in self.mock.calls
+
+    def not_modified(self, headers: dict[str, str] | None = None) -> HTTPError:
+        return self.http_error(HTTPStatus.NOT_MODIFIED, "Not Modified", headers)
+
+    def error(self, code: int, message: str | None = None, headers: dict[str, str] | None = None):
+        self.mock.responses[self.endpoint] = self.http_error(code, message, headers)
+
+    def http_error(
+        self,
+        code: int,
+        message: str | None = None,
+        headers: dict[str, str] | None = None,
+        body: dict | None = None,
+    ) -> HTTPError:
+        hdrs = HTTPMessage()
+        for key, value in (headers or {}).items():
+            hdrs.add_header(key, value)
+        fp = BytesIO(json.dumps(body).encode() if body else b"")
+        return HTTPError(self.endpoint[1], code, message or HTTPStatus(code).phrase, hdrs, fp)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now: float = 0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, duration: float):
+        self.now += duration
 
 
 @pytest.fixture
-def mock_api(owner: str, repo: str, mocker: MockerFixture) -> MockGhApi:
-    return MockGhApi(mocker, owner=owner, repo=repo)
+def clock(mocker: MockerFixture) -> Clock:
+    clock = Clock()
+    mocker.patch("need_checks.scheduler.monotonic", wraps=clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def mock_api(owner: str, repo: str, mocker: MockerFixture) -> Iterator[MockGhApi]:
+    mock = MockGhApi(mocker, owner=owner, repo=repo)
+    yield mock
+    assert not mock.unexpected, f"Unexpected GhApi calls: {mock.unexpected}"
 
 
 @pytest.fixture
@@ -166,6 +232,8 @@ def ctx(owner: str, repo: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path)
     )
     monkeypatch.setenv("GITHUB_RUN_ID", "45")
     monkeypatch.setenv("GITHUB_EVENT_PATH", str(event_path))
+    monkeypatch.delenv("GITHUB_RUN_ATTEMPT", raising=False)
+    monkeypatch.delenv("RUNNER_NAME", raising=False)
     return Context()
 
 
@@ -198,8 +266,8 @@ def mock_checks(mock_api: MockGhApi, ctx: Context) -> MockWorkflow:
             ctx.github.run_id = workflow_run["id"]
             ctx.github.workflow_ref = f"{repository}/{workflow_run['path']}@{ref}"
 
-        mock_api.actions.list_jobs_for_workflow_run(run_id=workflow_run["id"]).returns(
-            JobList(total_count=len(jobs), jobs=list(jobs))
+        mock_api.actions.list_jobs_for_workflow_run(run_id=workflow_run["id"]).paginated(
+            "jobs", list(jobs)
         )
         mock_api.actions.list_workflow_runs(
             workflow_id=file,
@@ -215,8 +283,8 @@ def mock_checks(mock_api: MockGhApi, ctx: Context) -> MockWorkflow:
             )
             for job in jobs
         ]
-        mock_api.checks.list_for_ref(owner=owner, repo=repo, ref=ref).returns(
-            CheckRunList(total_count=len(checks), check_runs=checks)
+        mock_api.checks.list_for_ref(owner=owner, repo=repo, ref=ref).paginated(
+            "check_runs", checks
         )
         return workflow_run
 
@@ -241,8 +309,12 @@ def mock_workflow(mock_api: MockGhApi, ctx: Context) -> MockWorkflow:
         if current:
             ctx.github.run_id = workflow_run["id"]
             ctx.github.workflow_ref = f"{repository}/{workflow_run['path']}@{ref}"
-        mock_api.actions.list_jobs_for_workflow_run(run_id=workflow_run["id"]).returns(
-            JobList(total_count=len(jobs), jobs=list(jobs))
+            # Fetched meanwhile the jobs, in case the current one is only known by its id
+            mock_api.repos.get_content(
+                owner=owner, repo=repo, path=workflow_run["path"], ref=ref.removeprefix("refs/")
+            ).returns(ContentFactory.build(content=b64encode(b"name: CI\n").decode()))
+        mock_api.actions.list_jobs_for_workflow_run(run_id=workflow_run["id"]).paginated(
+            "jobs", list(jobs)
         )
         mock_api.actions.list_workflow_runs(
             workflow_id=file,
@@ -261,12 +333,12 @@ def mock_workflow(mock_api: MockGhApi, ctx: Context) -> MockWorkflow:
             )
             for job in jobs
         ]
-        mock_api.checks.list_for_ref(owner=owner, repo=repo, ref=ref).returns(
-            CheckRunList(total_count=len(checks), check_runs=checks)
-        )
-        mock_api.checks.list_for_suite(owner=owner, repo=repo, check_suite_id=check_suite).returns(
-            CheckRunList(total_count=len(checks), check_runs=checks)
+        mock_api.checks.list_for_ref(owner=owner, repo=repo, ref=ref).paginated(
+            "check_runs", checks
         )
+        mock_api.checks.list_for_suite(
+            owner=owner, repo=repo, check_suite_id=check_suite
+        ).paginated("check_runs", checks)
         return workflow_run
 
     return fixture
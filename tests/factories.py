@@ -39,3 +39,7 @@ class ContentFactory(TypedDictFactory[types.Content]):
 
 class WorkflowRunFactory(TypedDictFactory[types.WorkflowRun]):
     pass
+
+
+class CommitStatusFactory(TypedDictFactory[types.CommitStatus]):
+    pass
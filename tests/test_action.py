@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 from base64 import b64encode
+from pathlib import Path
 from textwrap import dedent
+from threading import Barrier
 from typing import TYPE_CHECKING
 
 import pytest
 from click.testing import CliRunner
 from pytest_mock import MockerFixture
 
-from need_checks import action
+from need_checks import action, records
+from need_checks.client import GitHub
 from need_checks.errors import ActionError, RequirementsNotMet, Timeout, UnknownRef
-from need_checks.types import CheckRunList, Content, WorkflowRunList
+from need_checks.types import Content, WorkflowRunList
 from tests.factories import (
     CheckRunFactory,
+    CommitStatusFactory,
     ContentFactory,
     GitRefFactory,
     JobFactory,
@@ -20,9 +25,11 @@ from tests.factories import (
 )
 
 if TYPE_CHECKING:
+    from urllib.request import Request
+
     from need_checks.context import Context
-    from need_checks.types import Job
-    from tests.conftest import MockGhApi, MockWorkflow
+    from need_checks.types import GitRef, Job
+    from tests.conftest import Clock, MockGhApi, MockVerbCall, MockWorkflow
 
 
 def as_content(content: str) -> Content:
@@ -44,6 +51,7 @@ def test_get_ref_heads_main(mock_api: MockGhApi, owner: str, repo: str):
     ref = action.get_ref(mock_api.api, owner, repo, "heads/main")
 
     assert ref["ref"] == "refs/heads/main"
+    assert mock_api.urlopen.call_count == 1
 
 
 def test_get_ref_heads_main_with_refs_prefix(mock_api: MockGhApi, owner: str, repo: str):
@@ -52,11 +60,13 @@ def test_get_ref_heads_main_with_refs_prefix(mock_api: MockGhApi, owner: str, re
     ref = action.get_ref(mock_api.api, owner, repo, "refs/heads/main")
 
     assert ref["ref"] == "refs/heads/main"
+    assert mock_api.urlopen.call_count == 1
 
 
 def test_get_ref_tag(mock_api: MockGhApi, owner: str, repo: str):
     mock_api.git.get_ref(ref="1.2.3").error(404)
     mock_api.git.get_ref(ref="tags/1.2.3").returns(GitRefFactory.build(ref="refs/tags/1.2.3"))
+    mock_api.git.get_ref(ref="heads/1.2.3").error(404)
 
     ref = action.get_ref(mock_api.api, owner, repo, "1.2.3")
 
@@ -73,6 +83,50 @@ def test_get_ref_branch(mock_api: MockGhApi, owner: str, repo: str):
     assert ref["ref"] == "refs/heads/branch"
 
 
+def test_get_ref_priority(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.git.get_ref(ref="name").error(404)
+    mock_api.git.get_ref(ref="tags/name").returns(GitRefFactory.build(ref="refs/tags/name"))
+    mock_api.git.get_ref(ref="heads/name").returns(GitRefFactory.build(ref="refs/heads/name"))
+
+    ref = action.get_ref(mock_api.api, owner, repo, "name")
+
+    assert ref["ref"] == "refs/tags/name"
+
+
+def test_get_ref_candidates_are_concurrent(mock_api: MockGhApi, owner: str, repo: str):
+    barrier = Barrier(3, timeout=5)
+
+    def synchronized(request: Request, **kwargs):
+        barrier.wait()  # Only released if all candidates are requested at the same time
+        return mock_api.mock_urlopen(request, **kwargs)
+
+    mock_api.urlopen.side_effect = synchronized
+    mock_api.git.get_ref(ref="branch").error(404)
+    mock_api.git.get_ref(ref="tags/branch").error(404)
+    mock_api.git.get_ref(ref="heads/branch").returns(GitRefFactory.build(ref="refs/heads/branch"))
+
+    ref = action.get_ref(mock_api.api, owner, repo, "branch")
+
+    assert ref["ref"] == "refs/heads/branch"
+
+
+def test_aget_ref_candidates_are_concurrent(mock_api: MockGhApi, owner: str, repo: str):
+    barrier = Barrier(3, timeout=5)
+
+    def synchronized(request: Request, **kwargs):
+        barrier.wait()  # Only released if all candidates are requested at the same time
+        return mock_api.mock_urlopen(request, **kwargs)
+
+    mock_api.urlopen.side_effect = synchronized
+    mock_api.git.get_ref(ref="branch").error(404)
+    mock_api.git.get_ref(ref="tags/branch").returns(GitRefFactory.build(ref="refs/tags/branch"))
+    mock_api.git.get_ref(ref="heads/branch").returns(GitRefFactory.build(ref="refs/heads/branch"))
+
+    ref = asyncio.run(action.aget_ref(mock_api.api, owner, repo, "branch"))
+
+    assert ref["ref"] == "refs/tags/branch"
+
+
 def test_get_ref_unknown(mock_api: MockGhApi, owner: str, repo: str):
     mock_api.git.get_ref(ref="main").error(404)
     mock_api.git.get_ref(ref="tags/main").error(404)
@@ -114,6 +168,117 @@ def test_find_current_job_with_name(
     assert action.get_current_job(mock_api.api, ctx).get("id") == current_job["id"]
 
 
+def test_find_current_job_past_the_first_page(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    jobs = [*JobFactory.batch(256), current_job]
+    mock_workflow(*jobs, ref="refs/heads/main", current=True)
+
+    assert action.get_current_job(mock_api.api, ctx).get("id") == current_job["id"]
+
+
+def test_find_current_job_stops_fetching_on_match(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    mock_workflow(current_job, *JobFactory.batch(256), ref="refs/heads/main", current=True)
+
+    assert action.get_current_job(mock_api.api, ctx).get("id") == current_job["id"]
+    list_jobs = mock_api.actions.list_jobs_for_workflow_run
+    assert list_jobs(run_id=ctx.github.run_id, per_page=100, page=1).called
+    assert not list_jobs(run_id=ctx.github.run_id, per_page=100, page=2).called
+
+
+def test_find_current_job_by_runner(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    # Named job resolved without the workflow
+    current_job["name"] = "Not the job ID"
+    current_job["runner_name"] = ctx.runner.name = "runner-42"
+    other = JobFactory.build(name=ctx.github.job, status="completed", runner_name="runner-42")
+    mock_workflow(other, *JobFactory.batch(2), current_job, ref="refs/heads/main", current=True)
+
+    assert action.get_current_job(mock_api.api, ctx).get("id") == current_job["id"]
+    job = asyncio.run(action.aget_current_job(mock_api.api, ctx))
+    assert job["id"] == current_job["id"]
+
+
+def test_find_current_job_of_run_attempt(mock_api: MockGhApi, ctx: Context, current_job: Job):
+    ctx.github.run_attempt = 2
+    mock_api.actions.list_jobs_for_workflow_run_attempt(
+        run_id=ctx.github.run_id, attempt_number=2
+    ).paginated("jobs", [current_job])
+
+    assert action.get_current_job(mock_api.api, ctx).get("id") == current_job["id"]
+
+
+def test_aget_current_job_fetches_workflow_concurrently(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    current_job["name"] = "Not the job ID"
+    mock_workflow(current_job, *JobFactory.batch(2), ref="refs/heads/main", current=True)
+    content = as_content(f"jobs:\n  {ctx.github.job}:\n    name: {current_job['name']}\n")
+    mock_api.repos.get_content(path=".github/workflows/ci.yml", ref="heads/main").returns(content)
+    barrier = Barrier(2, timeout=5)
+
+    def synchronized(request: Request, **kwargs):
+        barrier.wait()  # Only released if both are requested at the same time
+        return mock_api.mock_urlopen(request, **kwargs)
+
+    mock_api.urlopen.side_effect = synchronized
+
+    job = asyncio.run(action.aget_current_job(mock_api.api, ctx))
+
+    assert job["id"] == current_job["id"]
+
+
+WORKFLOW = "name: my workflow\njobs:\n  my-job:\n    name: My job\n"
+
+
+@pytest.fixture
+def checkout(ctx: Context, owner: str, repo: str, tmp_path: Path) -> Path:
+    workspace = tmp_path / "workspace"
+    (workspace / ".git/refs/heads").mkdir(parents=True)
+    (workspace / ".git/HEAD").write_text("ref: refs/heads/main\n")
+    (workspace / ".git/refs/heads/main").write_text("sha\n")
+    (workspace / ".github/workflows").mkdir(parents=True)
+    (workspace / ".github/workflows/ci.yml").write_text(WORKFLOW)
+    ctx.github.workspace = workspace
+    ctx.github.repository = f"{owner}/{repo}"
+    ctx.github.workflow_sha = "sha"
+    return workspace
+
+
+def mock_workflow_content(mock_api: MockGhApi) -> MockVerbCall:
+    call = mock_api.repos.get_content(path=".github/workflows/ci.yml", ref="heads/main")
+    call.returns(as_content(WORKFLOW))
+    return call
+
+
+def test_load_workflow_from_checkout(mock_api: MockGhApi, ctx: Context, checkout: Path):
+    assert action.load_workflow(mock_api.api, ctx)["jobs"]["my-job"]["name"] == "My job"
+
+
+def test_load_workflow_from_another_commit(mock_api: MockGhApi, ctx: Context, checkout: Path):
+    ctx.github.workflow_sha = "other"
+    call = mock_workflow_content(mock_api)
+
+    assert action.load_workflow(mock_api.api, ctx)["name"] == "my workflow"
+    assert call.called
+
+
+def test_load_workflow_from_cache(mock_api: MockGhApi, ctx: Context, tmp_path: Path):
+    ctx.inputs.cache_dir = tmp_path / "cache"
+    ctx.github.workflow_sha = "sha"
+    call = mock_workflow_content(mock_api)
+
+    first = action.load_workflow(mock_api.api, ctx)
+    second = action.load_workflow(mock_api.api, ctx)
+
+    assert first == second
+    assert second["jobs"]["my-job"]["name"] == "My job"
+    assert len(mock_api.calls[call.endpoint]) == 1
+
+
 def test_fetch_workflow(mock_api: MockGhApi):
     ref = "owner/repo/.github/workflows/my-workflow.yml@refs/heads/my_branch"
     workflow = "name: my workflow"
@@ -145,11 +310,8 @@ def test_fetch_workflow_from_other_repo(mock_api: MockGhApi):
 def test_select_all_checks(mock_api: MockGhApi, ctx: Context):
     ref = GitRefFactory.build(ref="ref")
     ctx.inputs.repository = "owner/repo"
-    mock_api.checks.list_for_ref(ref="ref").returns(
-        CheckRunList(
-            total_count=3,
-            check_runs=CheckRunFactory.batch(3, status="completed", conclusion="success"),
-        )
+    mock_api.checks.list_for_ref(ref="ref").paginated(
+        "check_runs", CheckRunFactory.batch(3, status="completed", conclusion="success")
     )
 
     checks = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
@@ -162,9 +324,7 @@ def test_select_all_checks_but_self(mock_api: MockGhApi, ctx: Context, current_j
     ref = GitRefFactory.build(ref="ref")
     checks = CheckRunFactory.batch(3, status="completed", conclusion="success")
     checks.append(CheckRunFactory.build(status=current_job["status"], name=current_job["name"]))
-    mock_api.checks.list_for_ref(ref="ref").returns(
-        CheckRunList(total_count=len(checks), check_runs=checks)
-    )
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
 
     selected = action.select_checks(mock_api.api, ctx, ref, current_job)
 
@@ -185,9 +345,7 @@ def test_select_workflow_checks_but_self(mock_api: MockGhApi, ctx: Context, curr
             status=current_job["status"], name=current_job["name"], check_suite={"id": 42}
         )
     )
-    mock_api.checks.list_for_suite(check_suite_id=42).returns(
-        CheckRunList(total_count=len(checks), check_runs=checks)
-    )
+    mock_api.checks.list_for_suite(check_suite_id=42).paginated("check_runs", checks)
 
     selected = action.select_checks(mock_api.api, ctx, ref, current_job, check_suite=42)
 
@@ -197,6 +355,174 @@ def test_select_workflow_checks_but_self(mock_api: MockGhApi, ctx: Context, curr
         assert check["name"] != current_job["name"]
 
 
+def test_select_checks_and_statuses(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.statuses = True
+    ref = GitRefFactory.build(ref="ref")
+    checks = CheckRunFactory.batch(2, status="completed", conclusion="success")
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+    commit_statuses = [
+        CommitStatusFactory.build(context=checks[0]["name"], state="success"),
+        CommitStatusFactory.build(context="jenkins", state="pending"),
+    ]
+    mock_api.repos.get_combined_status_for_ref(ref=ref["object"]["sha"]).paginated(
+        "statuses", commit_statuses
+    )
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert [check["name"] for check in selected] == [*(c["name"] for c in checks), "jenkins"]
+    assert action.decide_for_checks(ctx, selected) == action.Conclusion.KO
+
+
+def test_select_workflow_checks_ignores_statuses(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.statuses = True
+    ref = GitRefFactory.build(ref="ref")
+    checks = CheckRunFactory.batch(2, status="completed", conclusion="success")
+    mock_api.checks.list_for_suite(check_suite_id=42).paginated("check_runs", checks)
+
+    assert len(action.select_checks(mock_api.api, ctx, ref, JobFactory.build(), 42)) == 2
+
+
+def test_select_checks_filtered_while_streaming(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.include = ["test*", "re:lint"]
+    ctx.inputs.exclude = ["*docs*"]
+    ref = GitRefFactory.build(ref="ref")
+    names = ["test (3.12)", "test-docs", "pre-lint", "build"] * 60
+    checks = [CheckRunFactory.build(name=name, status="in_progress") for name in names]
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+    ctx.inputs.wait = True
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert {check["name"] for check in selected} == {"test (3.12)", "pre-lint"}
+    assert len(selected) == 120
+
+
+def test_select_checks_by_name_server_side(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.include = ["lint", "test"]
+    ref = GitRefFactory.build(ref="ref")
+    for name in ctx.inputs.include:
+        mock_api.checks.list_for_ref(ref="ref", check_name=name).paginated(
+            "check_runs",
+            [CheckRunFactory.build(name=name, status="completed", conclusion="success")],
+        )
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert [check["name"] for check in selected] == ["lint", "test"]
+    assert not mock_api.checks.list_for_ref(ref="ref", per_page=100, page=1).called
+
+
+def test_select_checks_slim_projection(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ref = GitRefFactory.build(ref="ref")
+    check = CheckRunFactory.build(status="completed", conclusion="success", check_suite={"id": 7})
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", [check])
+
+    (selected,) = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert set(selected) == set(records.FIELDS)
+    assert selected["id"] == check["id"]
+    assert selected["check_suite"] == {"id": 7}
+
+
+def test_select_checks_shared_between_jobs(mock_api: MockGhApi, ctx: Context, tmp_path: Path):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.cache_dir = tmp_path
+    ctx.inputs.cache_ttl = 30
+    ref = GitRefFactory.build(ref="ref")
+    checks = CheckRunFactory.batch(3, status="completed", conclusion="success")
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+    list_for_ref = mock_api.checks.list_for_ref(ref="ref", per_page=100, page=1)
+
+    first = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+    # Another job, with its own client
+    other = action.select_checks(GitHub(), ctx, ref, JobFactory.build())
+
+    assert [check["id"] for check in other] == [check["id"] for check in first]
+    assert len(mock_api.calls[list_for_ref.endpoint]) == 1
+
+
+def test_select_checks_shared_expired(
+    mock_api: MockGhApi, ctx: Context, tmp_path: Path, mocker: MockerFixture
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.cache_dir = tmp_path
+    ctx.inputs.cache_ttl = 30
+    ref = GitRefFactory.build(ref="ref")
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", CheckRunFactory.batch(3))
+    list_for_ref = mock_api.checks.list_for_ref(ref="ref", per_page=100, page=1)
+    time = mocker.patch("need_checks.action.time", return_value=1000)
+
+    action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+    time.return_value = 1031
+    action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert len(mock_api.calls[list_for_ref.endpoint]) == 2
+
+
+def test_prefetch_ignores_excluded_failures(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.exclude = ["flaky"]
+    ref = GitRefFactory.build(ref="ref")
+    checks = [
+        CheckRunFactory.build(name="flaky", status="completed", conclusion="failure"),
+        CheckRunFactory.build(name="test", status="completed", conclusion="success"),
+    ]
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+    watched = action.Watch(ctx.inputs.target, ref)
+
+    assert [check["name"] for check in action.prefetch_checks(mock_api.api, ctx, watched)] == [
+        "test"
+    ]
+
+
+def test_select_checks_over_multiple_pages(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ref = GitRefFactory.build(ref="ref")
+    checks = CheckRunFactory.batch(150, status="completed", conclusion="success")
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert [check["id"] for check in selected] == [check["id"] for check in checks]
+
+
+def test_select_checks_follows_link_header(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ref = GitRefFactory.build(ref="ref")
+    first, second = (
+        CheckRunFactory.batch(n, status="completed", conclusion="success") for n in (100, 10)
+    )
+    next_url = f"{mock_api.api.gh_host}/repos/owner/repo/commits/ref/check-runs?page=2"
+    mock_api.checks.list_for_ref(ref="ref", per_page=100, page=1).returns(
+        {"check_runs": first}, headers={"Link": f'<{next_url}>; rel="next"'}
+    )
+    mock_api.checks.list_for_ref(ref="ref", per_page=100, page=2).returns({"check_runs": second})
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert len(selected) == 110
+
+
+def test_select_checks_stop_fetching_on_failure(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ref = GitRefFactory.build(ref="ref")
+    checks = CheckRunFactory.batch(150, status="completed", conclusion="success")
+    checks[10]["conclusion"] = "failure"
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert len(selected) == 11
+    assert action.decide_for_checks(ctx, selected) == action.Conclusion.KO
+    assert not mock_api.checks.list_for_ref(ref="ref", per_page=100, page=2).called
+
+
 def test_decide_for_checks_empty(ctx: Context):
     assert action.decide_for_checks(ctx, []) == action.Conclusion.OK
 
@@ -251,6 +577,48 @@ def test_decide_for_checks_runnning_but_already_failed(status: str, ctx: Context
     assert action.decide_for_checks(ctx, checks) == action.Conclusion.KO
 
 
+@pytest.mark.parametrize("status", WAIT_STATUS)
+def test_decide_for_checks_already_failed_without_fail_fast(status: str, ctx: Context):
+    ctx.inputs.wait = True
+    ctx.inputs.fail_fast = False
+    checks = [
+        CheckRunFactory.build(status="completed", conclusion="failure"),
+        CheckRunFactory.build(status=status),
+    ]
+
+    assert action.decide_for_checks(ctx, checks) == action.Conclusion.WAIT
+    checks[1]["status"], checks[1]["conclusion"] = "completed", "success"
+    assert action.decide_for_checks(ctx, checks) == action.Conclusion.KO
+
+
+def test_decide_for_checks_consumes_until_failure(ctx: Context):
+    ctx.inputs.wait = True
+    checks = iter(
+        [
+            CheckRunFactory.build(status="in_progress"),
+            CheckRunFactory.build(status="completed", conclusion="failure"),
+            CheckRunFactory.build(status="completed", conclusion="success"),
+        ]
+    )
+
+    assert action.decide_for_checks(ctx, checks) == action.Conclusion.KO
+    assert len(list(checks)) == 1
+
+
+def test_select_checks_fetch_all_without_fail_fast(mock_api: MockGhApi, ctx: Context):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.wait = True
+    ctx.inputs.fail_fast = False
+    ref = GitRefFactory.build(ref="ref")
+    checks = CheckRunFactory.batch(150, status="completed", conclusion="success")
+    checks[10]["conclusion"] = "failure"
+    mock_api.checks.list_for_ref(ref="ref").paginated("check_runs", checks)
+
+    selected = action.select_checks(mock_api.api, ctx, ref, JobFactory.build())
+
+    assert len(selected) == 150
+
+
 def test_run_success_same_repo(
     mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
 ):
@@ -260,6 +628,7 @@ def test_run_success_same_repo(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     mock_workflow(
         current_job,
@@ -281,6 +650,7 @@ def test_run_success_same_repo_with_workflow(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     mock_workflow(
         current_job,
@@ -304,6 +674,7 @@ def test_same_repo_with_workflow_never_ran(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     # Current workflow
     mock_workflow(
@@ -333,6 +704,7 @@ def test_same_repo_with_workflow_multiple_runs_and_attempts(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     # Current workflow
     mock_workflow(
@@ -352,27 +724,27 @@ def test_same_repo_with_workflow_multiple_runs_and_attempts(
     # First workflow is the last with success, 2nd attempt
     workflow_runs[0].update(run_number=4012, run_attempt=2, check_suite_id=53)
     check = CheckRunFactory.build(status="completed", conclusion="success", check_suite={"id": 53})
-    mock_api.checks.list_for_suite(owner="owner", repo="repo", check_suite_id=53).returns(
-        CheckRunList(total_count=1, check_runs=[check])
+    mock_api.checks.list_for_suite(owner="owner", repo="repo", check_suite_id=53).paginated(
+        "check_runs", [check]
     )
     checks.append(check)
     # 2nd run the first failed attempt
     workflow_runs[1].update(run_number=4012, run_attempt=1, check_suite_id=52)
     check = CheckRunFactory.build(status="completed", conclusion="failure", check_suite={"id": 52})
-    mock_api.checks.list_for_suite(owner="owner", repo="repo", check_suite_id=52).returns(
-        CheckRunList(total_count=1, check_runs=[check])
+    mock_api.checks.list_for_suite(owner="owner", repo="repo", check_suite_id=52).paginated(
+        "check_runs", [check]
     )
     checks.append(check)
     # 3rd is the first run which has been canceled
     workflow_runs[2].update(run_number=4011, run_attempt=1, check_suite_id=51)
     check = CheckRunFactory.build(status="completed", conclusion="canceled", check_suite={"id": 51})
-    mock_api.checks.list_for_suite(owner="owner", repo="repo", check_suite_id=51).returns(
-        CheckRunList(total_count=1, check_runs=[check])
+    mock_api.checks.list_for_suite(owner="owner", repo="repo", check_suite_id=51).paginated(
+        "check_runs", [check]
     )
     checks.append(check)
 
-    mock_api.checks.list_for_ref(owner="owner", repo="repo", ref=ref["ref"]).returns(
-        CheckRunList(total_count=len(checks), check_runs=checks)
+    mock_api.checks.list_for_ref(owner="owner", repo="repo", ref=ref["ref"]).paginated(
+        "check_runs", checks
     )
 
     mock_api.actions.list_workflow_runs(
@@ -392,6 +764,7 @@ def test_run_success_other_repo(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(owner="other", ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(owner="other", ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(owner="other", ref=f"heads/{ctx.inputs.ref}").error(404)
 
     # Current workflow
     mock_workflow(
@@ -419,6 +792,7 @@ def test_run_failed(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     mock_workflow(
         current_job,
@@ -434,7 +808,7 @@ def test_run_failed(
 
 
 def test_run_wait_then_success(
-    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow, clock: Clock
 ):
     ctx.inputs.repository = "owner/repo"
     ctx.inputs.wait = True
@@ -445,12 +819,14 @@ def test_run_wait_then_success(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     jobs = JobFactory.batch(3, status="in_progress", conclusion=None)
     mock_workflow(current_job, *jobs, ref=ref["ref"], current=True)
 
     def remock(duration: int):
         assert duration == ctx.inputs.wait_interval
+        clock.sleep(duration)
         for job in jobs:
             job["conclusion"] = "success"
             job["status"] = "completed"
@@ -466,7 +842,7 @@ def test_run_wait_then_success(
 
 
 def test_run_wait_then_timeout(
-    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow, clock: Clock
 ):
     ctx.inputs.repository = "owner/repo"
     ctx.inputs.wait = True
@@ -477,6 +853,7 @@ def test_run_wait_then_timeout(
     ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
     mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
     mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
 
     mock_workflow(
         current_job,
@@ -485,7 +862,7 @@ def test_run_wait_then_timeout(
         current=True,
     )
 
-    mock_sleep = mock_api.mocker.patch("need_checks.action.sleep", return_value=None)
+    mock_sleep = mock_api.mocker.patch("need_checks.action.sleep", wraps=clock.sleep)
 
     with pytest.raises(Timeout):
         action.run(ctx)
@@ -495,6 +872,68 @@ def test_run_wait_then_timeout(
         assert mock_call == mock_api.mocker.call(ctx.inputs.wait_interval)
 
 
+def test_run_wait_last_poll_on_deadline(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow, clock: Clock
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.wait = True
+    ctx.inputs.wait_interval = 7
+    ctx.inputs.wait_timeout = 10
+    ctx.inputs.ref = "1.2.3"
+
+    ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
+    mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
+    mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
+
+    mock_workflow(
+        current_job,
+        *JobFactory.batch(3, status="in_progress"),
+        ref=ref["ref"],
+        current=True,
+    )
+
+    mock_sleep = mock_api.mocker.patch("need_checks.action.sleep", wraps=clock.sleep)
+
+    with pytest.raises(Timeout):
+        action.run(ctx)
+
+    assert mock_sleep.mock_calls == [mock_api.mocker.call(7), mock_api.mocker.call(3)]
+    assert clock.now == 10
+
+
+def test_run_wait_timeout_accounts_for_time_spent_outside_sleep(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow, clock: Clock
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.wait = True
+    ctx.inputs.wait_interval = 5
+    ctx.inputs.wait_timeout = 10
+    ctx.inputs.ref = "1.2.3"
+
+    ref = GitRefFactory.build(ref=f"refs/tags/{ctx.inputs.ref}")
+    mock_api.git.get_ref(ref=ctx.inputs.ref).error(404)
+    mock_api.git.get_ref(ref=f"tags/{ctx.inputs.ref}").returns(ref)
+    mock_api.git.get_ref(ref=f"heads/{ctx.inputs.ref}").error(404)
+
+    mock_workflow(
+        current_job,
+        *JobFactory.batch(3, status="in_progress"),
+        ref=ref["ref"],
+        current=True,
+    )
+
+    def slow_poll(duration: float):
+        clock.sleep(duration + 3)  # Simulate slow API calls
+
+    mock_sleep = mock_api.mocker.patch("need_checks.action.sleep", wraps=slow_poll)
+
+    with pytest.raises(Timeout):
+        action.run(ctx)
+
+    assert mock_sleep.mock_calls == [mock_api.mocker.call(5), mock_api.mocker.call(2)]
+
+
 @pytest.mark.usefixtures("ctx")
 def test_main_exit_0(mocker: MockerFixture):
     mocker.patch.object(action, "run")
@@ -526,3 +965,169 @@ def test_main_exit_unhandled_error_passthrough(mocker: MockerFixture):
     assert result.exit_code == 1
     assert isinstance(result.exception, ValueError)
     assert str(result.exception) == "Unhandled error"
+
+
+def test_run_fail_fast(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.wait = True
+    mock_api.git.get_ref(ref="main").returns(GitRefFactory.build(ref="refs/heads/main"))
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    failed = JobFactory.build(name="lint", status="completed", conclusion="failure")
+    mock_workflow(
+        current_job,
+        failed,
+        JobFactory.build(status="in_progress"),
+        ref="refs/heads/main",
+        current=True,
+    )
+    sleep = mock_api.mocker.patch("need_checks.action.sleep")
+
+    with pytest.raises(RequirementsNotMet, match="lint concluded with failure"):
+        action.run(ctx)
+
+    sleep.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "conclusions,fail_fast,expected",
+    [
+        pytest.param(["OK", "OK"], True, "OK", id="all-ok"),
+        pytest.param(["OK", "WAIT"], True, "WAIT", id="waiting"),
+        pytest.param(["KO", "WAIT"], True, "KO", id="fail-fast"),
+        pytest.param(["KO", "WAIT"], False, "WAIT", id="wait-for-others"),
+        pytest.param(["KO", "OK"], False, "KO", id="failed"),
+    ],
+)
+def test_aggregate(ctx: Context, conclusions: list[str], fail_fast: bool, expected: str):
+    ctx.inputs.fail_fast = fail_fast
+
+    conclusion = action.aggregate(ctx, [action.Conclusion(c) for c in conclusions])
+
+    assert conclusion == action.Conclusion(expected)
+
+
+def mock_other_target(mock_api: MockGhApi, conclusion: str) -> GitRef:
+    ref = GitRefFactory.build(ref="refs/tags/v1")
+    mock_api.git.get_ref(owner="other", repo="lib", ref="v1").returns(ref)
+    mock_api.git.get_ref(owner="other", repo="lib", ref="tags/v1").error(404)
+    mock_api.git.get_ref(owner="other", repo="lib", ref="heads/v1").error(404)
+    checks = CheckRunFactory.batch(2, status="completed", conclusion=conclusion)
+    mock_api.checks.list_for_ref(owner="other", repo="lib", ref=ref["ref"]).paginated(
+        "check_runs", checks
+    )
+    return ref
+
+
+def test_run_multiple_targets(
+    mock_api: MockGhApi,
+    ctx: Context,
+    current_job: Job,
+    mock_workflow: MockWorkflow,
+    capsys: pytest.CaptureFixture,
+):
+    ctx.inputs.targets = ["owner/repo@main", "other/lib@v1"]
+    mock_api.git.get_ref(ref="main").returns(GitRefFactory.build(ref="refs/heads/main"))
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    jobs = JobFactory.batch(2, status="completed", conclusion="success")
+    mock_workflow(current_job, *jobs, ref="refs/heads/main", current=True)
+    mock_other_target(mock_api, "success")
+
+    action.run(ctx)
+
+    out = capsys.readouterr().out
+    assert "owner/repo@main" in out
+    assert "other/lib@v1" in out
+
+
+def test_run_multiple_targets_one_failing(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.targets = ["owner/repo@main", "other/lib@v1"]
+    mock_api.git.get_ref(ref="main").returns(GitRefFactory.build(ref="refs/heads/main"))
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    jobs = JobFactory.batch(2, status="completed", conclusion="success")
+    mock_workflow(current_job, *jobs, ref="refs/heads/main", current=True)
+    mock_other_target(mock_api, "failure")
+
+    with pytest.raises(RequirementsNotMet):
+        action.run(ctx)
+
+
+def test_run_resolves_ref_and_job_concurrently(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    barrier = Barrier(4, timeout=5)  # The 3 ref candidates and the jobs listing
+
+    def synchronized(request: Request, **kwargs):
+        if "/git/ref/" in request.full_url or "/jobs?" in request.full_url:
+            barrier.wait()
+        return mock_api.mock_urlopen(request, **kwargs)
+
+    mock_api.urlopen.side_effect = synchronized
+    mock_api.git.get_ref(ref="main").returns(GitRefFactory.build(ref="refs/heads/main"))
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    jobs = JobFactory.batch(2, status="completed", conclusion="success")
+    mock_workflow(current_job, *jobs, ref="refs/heads/main", current=True)
+
+    action.run(ctx)
+
+
+def test_run_wait_is_cancellable(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.wait = True
+    ctx.inputs.wait_interval = 3600
+    mock_api.git.get_ref(ref="main").returns(GitRefFactory.build(ref="refs/heads/main"))
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    jobs = JobFactory.batch(2, status="in_progress", conclusion=None)
+    mock_workflow(current_job, *jobs, ref="refs/heads/main", current=True)
+    sleeping = asyncio.Event()
+
+    async def sleep(interval: float):
+        sleeping.set()
+        await asyncio.sleep(interval)
+
+    mock_api.mocker.patch("need_checks.action.sleep", side_effect=sleep)
+
+    async def main():
+        task = asyncio.create_task(action.arun(ctx))
+        await asyncio.wait_for(sleeping.wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+def test_run_fetch_checks_before_knowing_the_job(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    barrier = Barrier(2, timeout=5)  # The jobs and the check runs listings
+
+    def synchronized(request: Request, **kwargs):
+        if "/jobs?" in request.full_url or "/check-runs" in request.full_url:
+            barrier.wait()
+        return mock_api.mock_urlopen(request, **kwargs)
+
+    mock_api.urlopen.side_effect = synchronized
+    mock_api.git.get_ref(ref="main").returns(GitRefFactory.build(ref="refs/heads/main"))
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    jobs = JobFactory.batch(2, status="completed", conclusion="success")
+    mock_workflow(current_job, *jobs, ref="refs/heads/main", current=True)
+
+    action.run(ctx)
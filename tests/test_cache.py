@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from threading import Event, Thread
+
+from need_checks.cache import DiskCache
+
+
+def test_get_missing(tmp_path: Path):
+    assert DiskCache(tmp_path).get("missing") is None
+
+
+def test_set_and_get(tmp_path: Path):
+    cache = DiskCache(tmp_path / "cache")
+
+    cache.set("key", {"jobs": {"build": {"name": "Build"}}})
+
+    assert cache.get("key") == {"jobs": {"build": {"name": "Build"}}}
+    assert DiskCache(tmp_path / "cache").get("key") == {"jobs": {"build": {"name": "Build"}}}
+
+
+def test_ignore_corrupted_entries(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    cache.path("key").write_text("{not json")
+
+    assert cache.get("key") is None
+
+
+def test_evict_least_recently_used(tmp_path: Path):
+    cache = DiskCache(tmp_path, max_entries=2)
+    for age, key in enumerate(("recent", "old")):
+        cache.set(key, key)
+        os.utime(cache.path(key), (1000 - age, 1000 - age))
+    cache.get("old")  # Now the most recently used
+
+    cache.set("new", "new")
+
+    assert cache.get("old") == "old"
+    assert cache.get("new") == "new"
+    assert cache.get("recent") is None
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_evict_stale_locks_and_leftovers(tmp_path: Path):
+    cache = DiskCache(tmp_path, max_entries=1)
+    with cache.lock("old"):
+        cache.set("old", "old")
+    os.utime(cache.path("old"), (1000, 1000))
+    with cache.lock("orphan"):
+        pass
+    orphan = cache.path("orphan").with_suffix(".lock")
+    partial, recent = tmp_path / "partial.tmp", tmp_path / "recent.tmp"
+    partial.touch()
+    recent.touch()
+    for path in orphan, partial:
+        os.utime(path, (1000, 1000))
+
+    with cache.lock("new"):
+        cache.set("new", "new")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        [
+            cache.path("new").name,
+            cache.path("new").with_suffix(".lock").name,
+            cache.path("old").with_suffix(".lock").name,  # Recently used, maybe still awaited
+            "recent.tmp",
+        ]
+    )
+
+
+def test_evict_entries_removed_meanwhile(tmp_path: Path):
+    cache = DiskCache(tmp_path, max_entries=1)
+    (tmp_path / "gone.json").symlink_to(tmp_path / "missing.json")  # Listed but not found
+
+    cache.set("new", "new")
+
+    assert cache.get("new") == "new"
+
+
+def test_lock_is_exclusive(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    locked, acquired = Event(), Event()
+
+    def contend():
+        locked.wait()
+        with DiskCache(tmp_path).lock("key"):
+            acquired.set()
+
+    thread = Thread(target=contend)
+    thread.start()
+    with cache.lock("key"):
+        locked.set()
+        assert not acquired.wait(0.2)
+    thread.join(5)
+
+    assert acquired.is_set()
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import json
+from http.client import HTTPMessage
+from typing import TYPE_CHECKING
+from urllib.error import HTTPError
+
+import pytest
+from pytest_mock import MockerFixture
+
+from need_checks.client import (
+    MIN_REQUEST_TIMEOUT,
+    REQUEST_TIMEOUT,
+    RETRY_BACKOFF,
+    SECONDARY_RATE_LIMIT_WAIT,
+    GitHub,
+    RateLimit,
+    header,
+    is_idempotent,
+    links,
+)
+from need_checks.errors import RateLimited
+from need_checks.scheduler import Deadline
+from tests.factories import CheckRunFactory, GitRefFactory
+
+if TYPE_CHECKING:
+    from tests.conftest import Clock, MockGhApi
+
+
+def test_header_is_case_insensitive():
+    assert header({"etag": '"abc"'}, "ETag") == '"abc"'
+    assert header({"ETag": '"abc"'}, "etag") == '"abc"'
+    assert header({}, "ETag") is None
+
+
+def test_links():
+    link = (
+        '<https://api.github.com/repositories/1/commits/sha/check-runs?page=2>; rel="next", '
+        '<https://api.github.com/repositories/1/commits/sha/check-runs?page=5>; rel="last"'
+    )
+
+    assert links(link) == {
+        "next": "https://api.github.com/repositories/1/commits/sha/check-runs?page=2",
+        "last": "https://api.github.com/repositories/1/commits/sha/check-runs?page=5",
+    }
+    assert links(None) == {}
+
+
+def test_authenticate_from_environment(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "env-token")
+
+    assert GitHub().headers["Authorization"] == "token env-token"
+    assert GitHub(token="token").headers["Authorization"] == "token token"
+    monkeypatch.delenv("GITHUB_TOKEN")
+    assert "Authorization" not in GitHub().headers
+
+
+def test_responses_are_plain_dicts(mock_api: MockGhApi, owner: str, repo: str):
+    checks = CheckRunFactory.batch(2)
+    call = mock_api.checks.list_for_ref(ref="sha", check_name="lint", per_page=100, page=1)
+    call.returns({"total_count": 2, "check_runs": checks})
+
+    result = mock_api.api.checks.list_for_ref(
+        owner=owner, repo=repo, ref="sha", check_name="lint", per_page=100, page=1
+    )
+
+    assert type(result) is dict
+    assert type(result["check_runs"][0]) is dict
+    assert result == {"total_count": 2, "check_runs": checks}
+
+
+def test_reuse_cached_body_on_not_modified(mock_api: MockGhApi, owner: str, repo: str):
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    call = mock_api.git.get_ref(ref="heads/main")
+    call.returns([(ref, {"ETag": '"etag"'}), call.not_modified()])
+
+    first = mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+    second = mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    assert first == second == ref
+    (first_request, _), (second_request, _) = mock_api.calls[call.endpoint]
+    assert first_request.get_header("If-none-match") is None
+    assert second_request.get_header("If-none-match") == '"etag"'
+
+
+def test_cache_keeps_raw_bodies(mock_api: MockGhApi, owner: str, repo: str):
+    page = {"total_count": 2, "check_runs": CheckRunFactory.batch(2)}
+    call = mock_api.checks.list_for_ref(ref="sha", per_page=100, page=1)
+    call.returns([(page, {"ETag": '"etag"'}), call.not_modified()])
+
+    first = mock_api.api.checks.list_for_ref(
+        owner=owner, repo=repo, ref="sha", per_page=100, page=1
+    )
+    second = mock_api.api.checks.list_for_ref(
+        owner=owner, repo=repo, ref="sha", per_page=100, page=1
+    )
+
+    # Between polls, only the bytes are kept: the decoded payloads are the callers' to drop
+    (cached,) = mock_api.api.cache.values()
+    assert isinstance(cached.body, bytes)
+    assert json.loads(cached.body) == first == second == page
+    assert second is not first
+
+
+def test_cache_evicts_least_recently_used(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.api.max_cached = 2
+    for ref in ("heads/old", "heads/recent", "heads/new"):
+        call = mock_api.git.get_ref(ref=ref)
+        call.returns([(GitRefFactory.build(), {"ETag": '"etag"'}), call.not_modified()])
+
+    for ref in ("heads/old", "heads/recent", "heads/old", "heads/new"):
+        mock_api.api.git.get_ref(owner=owner, repo=repo, ref=ref)
+
+    assert list(mock_api.api.cache) == [
+        f"/repos/{owner}/{repo}/git/ref/heads/old",
+        f"/repos/{owner}/{repo}/git/ref/heads/new",
+    ]
+
+
+def test_fetch_again_when_modified(mock_api: MockGhApi, owner: str, repo: str):
+    first_ref, second_ref = GitRefFactory.batch(2, ref="refs/heads/main")
+    call = mock_api.git.get_ref(ref="heads/main")
+    call.returns([(first_ref, {"ETag": '"first"'}), (second_ref, {"ETag": '"second"'})])
+
+    mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+    assert mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main") == second_ref
+
+    assert mock_api.api.cache[f"/repos/{owner}/{repo}/git/ref/heads/main"].etag == '"second"'
+
+
+def test_no_conditional_request_without_etag(mock_api: MockGhApi, owner: str, repo: str):
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    call = mock_api.git.get_ref(ref="heads/main")
+    call.returns([ref, ref])
+
+    mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+    mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    assert not mock_api.api.cache
+    for request, _ in mock_api.calls[call.endpoint]:
+        assert request.get_header("If-none-match") is None
+
+
+@pytest.mark.parametrize(
+    "timeout,elapsed,expected",
+    [
+        pytest.param(None, 0, REQUEST_TIMEOUT, id="no-deadline"),
+        pytest.param(600, 0, REQUEST_TIMEOUT, id="far-deadline"),
+        pytest.param(600, 590, 10, id="near-deadline"),
+        pytest.param(600, 600, MIN_REQUEST_TIMEOUT, id="on-deadline"),
+    ],
+)
+def test_request_timeout_from_deadline(
+    clock: Clock, timeout: int | None, elapsed: int, expected: float
+):
+    github = GitHub(deadline=Deadline(timeout))
+    clock.sleep(elapsed)
+
+    assert github.request_timeout() == expected
+
+
+def test_request_timeout_is_sent(mock_api: MockGhApi, owner: str, repo: str, clock: Clock):
+    mock_api.api.deadline = Deadline(20)
+    clock.sleep(5)
+    mock_api.git.get_ref(ref="heads/main").returns(GitRefFactory.build(ref="refs/heads/main"))
+
+    mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    (urlopen_call,) = mock_api.urlopen.mock_calls
+    assert urlopen_call.kwargs["timeout"] == 15
+
+
+def rate_limit_headers(remaining: int, limit: int = 5000, reset: float = 0, **kwargs: str):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset)),
+        **kwargs,
+    }
+
+
+def test_rate_limit_from_headers():
+    headers = rate_limit_headers(42, reset=1700000000, **{"X-RateLimit-Resource": "graphql"})
+
+    assert RateLimit.from_headers(headers) == RateLimit(5000, 42, 1700000000, "graphql")
+    assert RateLimit.from_headers({}) is None
+
+
+@pytest.mark.parametrize(
+    "remaining,calls,expected",
+    [
+        pytest.param(4000, 2, 0, id="plenty"),
+        pytest.param(1000, 2, 0, id="reserve-limit"),
+        pytest.param(100, 1, 36, id="low"),
+        pytest.param(100, 5, 180, id="low-many-calls"),
+        pytest.param(0, 1, 3600, id="exhausted"),
+    ],
+)
+def test_rate_limit_pace(mocker: MockerFixture, remaining: int, calls: int, expected: float):
+    mocker.patch("need_checks.client.time", return_value=1000)
+    rate_limit = RateLimit(limit=4000, remaining=remaining, reset=4600)
+
+    assert rate_limit.pace(calls) == expected
+
+
+def test_track_rate_limit(mock_api: MockGhApi, owner: str, repo: str):
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    mock_api.git.get_ref(ref="heads/main").returns(ref, headers=rate_limit_headers(42))
+
+    mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    assert mock_api.api.rate_limit == RateLimit(5000, 42, 0)
+    assert mock_api.api.requests == 1
+
+
+@pytest.mark.parametrize(
+    "code,headers,delay",
+    [
+        pytest.param(429, {"Retry-After": "12"}, 12, id="429-retry-after"),
+        pytest.param(403, {"Retry-After": "12"}, 12, id="403-retry-after"),
+        pytest.param(403, rate_limit_headers(0, reset=1030), 30, id="primary"),
+        pytest.param(429, {}, SECONDARY_RATE_LIMIT_WAIT, id="secondary"),
+    ],
+)
+def test_retry_when_rate_limited(
+    mock_api: MockGhApi, owner: str, repo: str, code: int, headers: dict, delay: float
+):
+    mock_api.mocker.patch("need_checks.client.time", return_value=1000)
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    call = mock_api.git.get_ref(ref="heads/main")
+    call.returns([call.http_error(code, headers=headers), ref])
+
+    assert mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main") == ref
+    sleep.assert_called_once_with(delay)
+
+
+def test_retry_bare_secondary_rate_limit(mock_api: MockGhApi, owner: str, repo: str):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    call = mock_api.git.get_ref(ref="heads/main")
+    message = "You have exceeded a secondary rate limit. Please wait a few minutes."
+    call.returns([call.http_error(403, body={"message": message}), ref])
+
+    assert mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main") == ref
+    sleep.assert_called_once_with(SECONDARY_RATE_LIMIT_WAIT)
+
+
+def test_forbidden_is_not_retried(mock_api: MockGhApi, owner: str, repo: str):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    mock_api.git.get_ref(ref="heads/main").error(403)
+
+    with pytest.raises(HTTPError) as excinfo:
+        mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    assert excinfo.value.code == 403
+    sleep.assert_not_called()
+
+
+def test_rate_limited_beyond_deadline(mock_api: MockGhApi, owner: str, repo: str, clock: Clock):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    mock_api.api.deadline = Deadline(60)
+    mock_api.git.get_ref(ref="heads/main").error(429, headers={"Retry-After": "120"})
+
+    with pytest.raises(RateLimited):
+        mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    sleep.assert_not_called()
+
+
+@pytest.fixture
+def no_jitter(mocker: MockerFixture):
+    mocker.patch("need_checks.scheduler.random.uniform", return_value=1)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        pytest.param(HTTPError("url", 502, "Bad Gateway", HTTPMessage(), None), id="5xx"),
+        pytest.param(ConnectionResetError(), id="connection-reset"),
+        pytest.param(TimeoutError(), id="timeout"),
+    ],
+)
+@pytest.mark.usefixtures("no_jitter")
+def test_retry_transient_failures(mock_api: MockGhApi, owner: str, repo: str, error: Exception):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    mock_api.git.get_ref(ref="heads/main").returns([error, error, ref])
+
+    assert mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main") == ref
+    assert sleep.call_args_list == [((RETRY_BACKOFF,),), ((RETRY_BACKOFF * 2,),)]
+
+
+@pytest.mark.usefixtures("no_jitter")
+def test_give_up_after_retries(mock_api: MockGhApi, owner: str, repo: str):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    mock_api.api.retries = 2
+    call = mock_api.git.get_ref(ref="heads/main")
+    call.returns([ConnectionResetError()] * 3)
+
+    with pytest.raises(ConnectionResetError):
+        mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    assert sleep.call_count == 2
+    assert len(mock_api.calls[call.endpoint]) == 3
+
+
+def test_retries_count_against_deadline(mock_api: MockGhApi, owner: str, repo: str, clock: Clock):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    mock_api.api.deadline = Deadline(0.5)
+    mock_api.git.get_ref(ref="heads/main").returns([TimeoutError(), {}])
+
+    with pytest.raises(TimeoutError):
+        mock_api.api.git.get_ref(owner=owner, repo=repo, ref="heads/main")
+
+    sleep.assert_not_called()
+
+
+def test_mutations_are_not_retried(mock_api: MockGhApi):
+    sleep = mock_api.mocker.patch("need_checks.client.sleep")
+    mock_api.graphql(ConnectionResetError(), {"data": {}})
+
+    with pytest.raises(ConnectionResetError):
+        mock_api.api("/graphql", "POST", data={"query": "mutation { noop }"})
+
+    sleep.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "path,verb,data,expected",
+    [
+        ("/repos", "GET", None, True),
+        ("/repos", None, None, True),
+        ("/repos", "POST", {"name": "repo"}, False),
+        ("/repos", "DELETE", None, False),
+        ("/graphql", "POST", {"query": "query { viewer { login } }"}, True),
+        ("/graphql", "POST", {"query": " mutation { noop }"}, False),
+    ],
+)
+def test_is_idempotent(path: str, verb: str | None, data: dict | None, expected: bool):
+    assert is_idempotent(path, verb, data) is expected
@@ -3,7 +3,7 @@ from typing import Any
 
 import pytest
 
-from need_checks.context import Context, Inputs
+from need_checks.context import Context, Inputs, Target
 
 
 def test_target_owner_and_repo():
@@ -13,6 +13,44 @@ def test_target_owner_and_repo():
     assert inputs.target_repo == "repo"
 
 
+def test_parse_target():
+    target = Target.parse("owner/repo@refs/heads/main")
+
+    assert target == Target("owner", "repo", "refs/heads/main")
+    assert target.repository == "owner/repo"
+    assert str(target) == "owner/repo@refs/heads/main"
+
+
+@pytest.mark.parametrize("value", ["owner/repo", "repo@main", "/repo@main", "owner/@main"])
+def test_parse_invalid_target(value: str):
+    with pytest.raises(ValueError):
+        Target.parse(value)
+
+
+def test_default_target():
+    inputs = Inputs(repository="owner/repo", ref="main")
+
+    assert inputs.all_targets == [Target("owner", "repo", "main")]
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    (
+        pytest.param("", [], id="empty"),
+        pytest.param(
+            "owner/repo@main, other/lib@v1",
+            [Target("owner", "repo", "main"), Target("other", "lib", "v1")],
+            id="many",
+        ),
+    ),
+)
+def test_targets_input(value: str, expected: list[Target], monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("INPUT_TARGETS", value)
+    inputs = Inputs(repository="owner/repo", ref="main")
+
+    assert inputs.all_targets == (expected or [inputs.target])
+
+
 @pytest.mark.parametrize(
     "value,expected",
     (
@@ -45,3 +83,26 @@ def test_parse_github_composite_docker_action_env(monkeypatch: pytest.MonkeyPatc
     assert ctx.github.event.repository.name == "repo"
     assert ctx.inputs.token == "my-token"
     assert ctx.inputs.conclusions == ["skipped", "cancelled"]
+
+
+def test_include_exclude_inputs(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("INPUT_INCLUDE", "test*, re:^lint")
+    monkeypatch.setenv("INPUT_EXCLUDE", "")
+    inputs = Inputs()
+
+    assert inputs.include == ["test*", "re:^lint"]
+    assert inputs.exclude == []
+    assert inputs.check_filter("lint-docs")
+    assert not inputs.check_filter("build")
+
+
+def test_invalid_pattern_input():
+    with pytest.raises(ValueError, match="Invalid pattern"):
+        Inputs(include=["re:test("])
+
+
+def test_webhook_mode_requires_a_secret():
+    with pytest.raises(ValueError, match="webhook_secret"):
+        Inputs(wait_mode="webhook")
+
+    assert Inputs(wait_mode="webhook", webhook_secret="s3cr3t").webhook_secret == "s3cr3t"
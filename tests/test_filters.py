@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from need_checks import filters
+
+
+@pytest.mark.parametrize(
+    "include,exclude,name,expected",
+    [
+        ((), (), "anything", True),
+        (("test*",), (), "test (3.12)", True),
+        (("test*",), (), "lint", False),
+        (("test*", "lint"), (), "lint", True),
+        (("lint",), (), "lint-docs", False),
+        (("re:^test \\(3\\.1[23]\\)$",), (), "test (3.12)", True),
+        (("re:3\\.1[23]",), (), "test (3.13)", True),
+        (("re:3\\.1[23]",), (), "test (3.11)", False),
+        ((), ("*docs*",), "lint-docs", False),
+        (("lint*",), ("*docs",), "lint-docs", False),
+        (("lint*",), ("*docs",), "lint-code", True),
+    ],
+)
+def test_check_filter(include: tuple, exclude: tuple, name: str, expected: bool):
+    assert filters.check_filter(include, exclude)(name) is expected
+
+
+def test_compile_patterns_as_a_single_regex():
+    pattern = filters.compile_patterns(("test*", "re:lint"))
+
+    assert pattern is not None
+    assert pattern.match("test (3.12)")
+    assert pattern.match("pre-lint")
+    assert filters.compile_patterns(()) is None
+
+
+def test_check_filter_is_compiled_once():
+    assert filters.check_filter(("a*",), ()) is filters.check_filter(("a*",), ())
+
+
+@pytest.mark.parametrize(
+    "patterns,expected",
+    [
+        ([], None),
+        (["lint", "test (3.12)"], ["lint", "test (3.12)"]),
+        (["lint", "test*"], None),
+        (["lint", "re:test"], None),
+    ],
+)
+def test_literal_names(patterns: list[str], expected: list[str] | None):
+    assert filters.literal_names(patterns) == expected
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from need_checks import action, graphql
+from need_checks.errors import GraphQLError, UnknownRef
+from tests.factories import JobFactory
+
+if TYPE_CHECKING:
+    from need_checks.context import Context
+    from need_checks.types import Job
+    from tests.conftest import MockGhApi, MockWorkflow
+
+SHA = "a" * 40
+
+
+def page(nodes: list, cursor: str | None = None) -> dict[str, Any]:
+    return {"pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}, "nodes": nodes}
+
+
+def run(id: int, status: str = "COMPLETED", conclusion: str | None = "SUCCESS") -> dict:
+    return {
+        "id": f"CR_{id}",
+        "databaseId": id,
+        "name": f"check-{id}",
+        "status": status,
+        "conclusion": conclusion,
+        "startedAt": "2024-01-01T00:00:00Z",
+        "completedAt": "2024-01-01T00:01:00Z" if status == "COMPLETED" else None,
+        "detailsUrl": None,
+        "permalink": f"https://github.com/owner/repo/runs/{id}",
+    }
+
+
+def suite(id: int, *runs: dict, cursor: str | None = None) -> dict:
+    return {"id": f"CS_{id}", "databaseId": id, "checkRuns": page(list(runs), cursor)}
+
+
+def commit(*suites: dict, cursor: str | None = None) -> dict:
+    return {"oid": SHA, "checkSuites": page(list(suites), cursor)}
+
+
+def resolved(target: dict, alias: str = "head", prefix: str = "refs/heads/", name: str = "main"):
+    ref = {"id": "REF", "prefix": prefix, "name": name, "target": target}
+    return {"data": {"repository": {"label": None, "tag": None, "head": None, alias: ref}}}
+
+
+def test_resolve_branch(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.graphql(resolved(commit(suite(1, run(1), run(2, "IN_PROGRESS", None)))))
+
+    ref, checks = graphql.resolve(mock_api.api, owner, repo, "main")
+
+    assert ref["ref"] == "refs/heads/main"
+    assert ref["object"]["sha"] == SHA
+    assert [(c["id"], c["status"], c["conclusion"]) for c in checks] == [
+        (1, "completed", "success"),
+        (2, "in_progress", None),
+    ]
+    assert all(check["check_suite"] == {"id": 1} for check in checks)
+    (call,) = mock_api.graphql_calls
+    assert call["variables"] == {
+        "owner": owner,
+        "repo": repo,
+        "label": "refs/main",
+        "tag": "refs/tags/main",
+        "head": "refs/heads/main",
+        "suites": None,
+    }
+
+
+def test_resolve_annotated_tag(mock_api: MockGhApi, owner: str, repo: str):
+    tag = {"target": commit(suite(1, run(1)))}
+    mock_api.graphql(resolved(tag, alias="tag", prefix="refs/tags/", name="1.2.3"))
+
+    ref, checks = graphql.resolve(mock_api.api, owner, repo, "1.2.3")
+
+    assert ref["ref"] == "refs/tags/1.2.3"
+    assert ref["object"]["sha"] == SHA
+    assert len(checks) == 1
+
+
+def test_resolve_unknown(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.graphql({"data": {"repository": {"label": None, "tag": None, "head": None}}})
+
+    with pytest.raises(UnknownRef):
+        graphql.resolve(mock_api.api, owner, repo, "main")
+
+
+def test_errors(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.graphql({"data": None, "errors": [{"message": "Boom"}]})
+
+    with pytest.raises(GraphQLError, match="Boom"):
+        graphql.resolve(mock_api.api, owner, repo, "main")
+
+
+def test_paginate_suites_and_runs(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.graphql(
+        resolved(commit(suite(1, run(1), cursor="runs"), cursor="suites")),
+        {"data": {"node": {"checkRuns": page([run(2)])}}},
+        {"data": {"repository": {"object": commit(suite(2, run(3)))}}},
+    )
+
+    _, checks = graphql.resolve(mock_api.api, owner, repo, "main")
+
+    assert [check["id"] for check in checks] == [1, 2, 3]
+    _, runs_call, suites_call = mock_api.graphql_calls
+    assert runs_call["variables"] == {"id": "CS_1", "runs": "runs"}
+    assert suites_call["variables"]["suites"] == "suites"
+
+
+def test_iter_checks_in_suite(mock_api: MockGhApi, owner: str, repo: str):
+    mock_api.graphql(
+        {"data": {"repository": {"object": commit(suite(1, run(1)), suite(2, run(2), run(3)))}}}
+    )
+
+    checks = graphql.iter_checks(mock_api.api, owner, repo, SHA, check_suite=2)
+
+    assert [check["id"] for check in checks] == [2, 3]
+    (call,) = mock_api.graphql_calls
+    assert call["variables"]["oid"] == SHA
+
+
+def test_run_with_graphql(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.api = "graphql"
+    mock_workflow(current_job, *JobFactory.batch(2), ref="refs/heads/main", current=True)
+    mock_api.graphql(resolved(commit(suite(1, run(1), run(2)))))
+
+    action.run(ctx)
+
+    assert len(mock_api.graphql_calls) == 1
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import pytest
+
+from scripts.bench_import import importtime
+
+# Only needed on some code paths (or by the tests), never on startup
+LAZY_MODULES = ["strictyaml", "ghapi", "fastcore"]
+
+
+@pytest.fixture(scope="module")
+def timings() -> dict[str, int]:
+    return importtime("need_checks.action")
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_lazy_imports(timings: dict[str, int], module: str):
+    assert module not in timings
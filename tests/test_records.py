@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from need_checks import records
+from tests.factories import CheckRunFactory
+
+
+def test_compact_keeps_only_relied_upon_fields():
+    check = CheckRunFactory.build(status="completed", conclusion="success", check_suite={"id": 7})
+
+    record = records.compact(check)
+
+    assert dict(record) == {
+        **{field: check[field] for field in records.FIELDS if field != "check_suite"},
+        "check_suite": {"id": 7},
+    }
+    assert not hasattr(record, "__dict__")
+
+
+def test_compact_without_check_suite():
+    record = records.compact(CheckRunFactory.build(check_suite=None))
+
+    assert record["check_suite"] is None
+    assert record.get("check_suite", {}) is None
+
+
+def test_status_and_conclusion_are_shared():
+    first, second = (
+        records.compact(check)
+        for check in CheckRunFactory.batch(2, status="completed", conclusion="failure")
+    )
+
+    assert first["status"] is second["status"] is records.CheckStatus.COMPLETED
+    assert first["conclusion"] is second["conclusion"] is records.CheckConclusion.FAILURE
+    assert first["status"] == "completed"
+
+
+def test_unknown_values_are_kept():
+    record = records.compact(CheckRunFactory.build(status="unknown", conclusion="unknown"))
+
+    assert (record["status"], record["conclusion"]) == ("unknown", "unknown")
+
+
+def test_record_is_read_only():
+    record = records.CheckRecord(1, "build", "queued")
+
+    with pytest.raises(FrozenInstanceError):
+        record.name = "lint"
+    with pytest.raises(KeyError):
+        record["output"]
+    assert record.get("output") is None
+
+
+def test_record_serializes_as_a_dict():
+    check = CheckRunFactory.build(status="completed", conclusion="success", check_suite={"id": 7})
+    record = records.compact(check)
+
+    assert json.loads(json.dumps(record, default=dict)) == record
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import math
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+from pytest_mock import MockerFixture
+
+from need_checks import scheduler
+from need_checks.context import Inputs
+from need_checks.types import CheckRun
+from tests.factories import CheckRunFactory
+
+if TYPE_CHECKING:
+    from tests.conftest import Clock
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(mocker: MockerFixture):
+    mocker.patch("need_checks.scheduler.random.uniform", return_value=1)
+
+
+def completed(duration: int) -> CheckRun:
+    return CheckRunFactory.build(
+        status="completed",
+        conclusion="success",
+        started_at=(NOW - timedelta(hours=1)).isoformat(),
+        completed_at=(NOW - timedelta(hours=1, seconds=-duration)).isoformat(),
+    )
+
+
+def running(since: int) -> CheckRun:
+    return CheckRunFactory.build(
+        status="in_progress",
+        conclusion=None,
+        started_at=(NOW - timedelta(seconds=since)).isoformat(),
+        completed_at=None,
+    )
+
+
+def test_fixed():
+    poll = scheduler.Fixed(42)
+
+    assert poll.next_interval([running(10)]) == 42
+    assert poll.next_interval([running(20)]) == 42
+
+
+def test_backoff_grows_until_max():
+    poll = scheduler.Backoff(5, 30)
+    checks = [running(10)]
+
+    assert [poll.next_interval(checks) for _ in range(5)] == [5, 10, 20, 30, 30]
+
+
+def test_backoff_resets_on_progress():
+    poll = scheduler.Backoff(5, 30)
+    checks = [running(10), CheckRunFactory.build(status="queued")]
+    poll.next_interval(checks)
+    poll.next_interval(checks)
+
+    checks[1]["status"] = "in_progress"
+
+    assert poll.next_interval(checks) == 5
+
+
+def test_estimate_eta():
+    checks = [completed(60), completed(100), completed(120), running(30), running(80)]
+
+    assert scheduler.estimate_eta(checks, NOW) == 20
+
+
+def test_estimate_eta_without_history():
+    assert scheduler.estimate_eta([running(30)], NOW) is None
+
+
+def test_adaptive_wakes_up_on_eta():
+    poll = scheduler.Adaptive(5, 300)
+    checks = [completed(100), running(30)]
+
+    assert poll.next_interval(checks, NOW) == 70
+
+
+def test_adaptive_fast_poll_when_overdue():
+    poll = scheduler.Adaptive(5, 300)
+    checks = [completed(100), running(500)]
+
+    assert poll.next_interval(checks, NOW) == 5
+
+
+def test_adaptive_backoff_while_queued():
+    poll = scheduler.Adaptive(5, 300)
+    checks = [completed(100), CheckRunFactory.build(status="queued")]
+
+    assert [poll.next_interval(checks, NOW) for _ in range(3)] == [5, 10, 20]
+
+
+@pytest.mark.parametrize(
+    "strategy,expected",
+    [
+        ("fixed", scheduler.Fixed),
+        ("backoff", scheduler.Backoff),
+        ("adaptive", scheduler.Adaptive),
+    ],
+)
+def test_for_inputs(strategy: str, expected: type):
+    inputs = Inputs(wait_strategy=strategy)
+
+    assert isinstance(scheduler.for_inputs(inputs), expected)
+
+
+def test_deadline(clock: Clock):
+    deadline = scheduler.Deadline(10)
+    clock.sleep(4)
+
+    assert deadline.elapsed == 4
+    assert deadline.remaining == 6
+    assert not deadline.expired
+
+    clock.sleep(7)
+
+    assert deadline.remaining == 0
+    assert deadline.expired
+
+
+def test_deadline_without_timeout(clock: Clock):
+    deadline = scheduler.Deadline()
+    clock.sleep(3600)
+
+    assert deadline.remaining == math.inf
+    assert not deadline.expired
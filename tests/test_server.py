@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from threading import Event, Thread
+from time import sleep
+from typing import TYPE_CHECKING, Any
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from need_checks import action, server
+from need_checks.context import Inputs
+from need_checks.errors import ActionError, RequirementsNotMet
+from tests.factories import CheckRunFactory, GitRefFactory, JobFactory
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+    from need_checks.context import Context
+    from need_checks.types import GitRef, Job
+    from tests.conftest import MockGhApi, MockWorkflow
+
+
+@pytest.fixture
+def ref(mock_api: MockGhApi) -> GitRef:
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    mock_api.git.get_ref(ref="main").returns(ref)
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    return ref
+
+
+@pytest.fixture
+def daemon(mock_api: MockGhApi) -> Iterator[server.Server]:
+    daemon = server.Server(("127.0.0.1", 0), server.Hub(mock_api.api))
+    thread = Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    daemon.server_close()
+
+
+def post(daemon: server.Server, payload: dict[str, Any]) -> dict[str, Any]:
+    body = json.dumps(payload).encode()
+    with urlopen(Request(daemon.url, body, method="POST"), timeout=10) as response:
+        return json.loads(response.read())
+
+
+def inputs(**kwargs) -> dict[str, Any]:
+    return {"repository": "owner/repo", "ref": "main", **kwargs}
+
+
+def test_hub_polls_once_per_commit(mock_api: MockGhApi, ref: GitRef):
+    checks = CheckRunFactory.batch(3, status="completed", conclusion="success")
+    mock_api.checks.list_for_ref(ref=ref["ref"]).paginated("check_runs", checks)
+    hub = server.Hub(mock_api.api)
+    verdicts: list[dict] = []
+
+    def wait(job: str):
+        verdicts.append(hub.wait([Inputs(**inputs()).target], Inputs(**inputs()), job))
+
+    jobs = [Thread(target=wait, args=(f"job-{index}",)) for index in range(5)]
+    for job in jobs:
+        job.start()
+    for _ in range(500):  # Wait for all the jobs to be subscribed
+        if sum(len(commit.waiters) for commit in hub.commits.values()) == 5:
+            break
+        sleep(0.01)
+    (commit,) = hub.commits.values()
+    hub.poll(commit)
+    for job in jobs:
+        job.join(5)
+
+    assert [verdict["conclusion"] for verdict in verdicts] == ["OK"] * 5
+    list_for_ref = mock_api.checks.list_for_ref(ref=ref["ref"], per_page=100, page=1)
+    assert len(mock_api.calls[list_for_ref.endpoint]) == 1
+    assert not hub.commits
+
+
+def test_serve_waits_for_a_verdict(
+    mock_api: MockGhApi, ref: GitRef, daemon: server.Server, mocker: MockerFixture
+):
+    running = CheckRunFactory.build(name="test", status="in_progress", conclusion=None)
+    done = {**running, "status": "completed", "conclusion": "success"}
+    call = mock_api.checks.list_for_ref(ref=ref["ref"], per_page=100, page=1)
+    mock_api.responses[call.endpoint] = [
+        {"total_count": 1, "check_runs": [running]},
+        {"total_count": 1, "check_runs": [done]},
+    ]
+    mocker.patch("need_checks.scheduler.Fixed.next_interval", return_value=0.01)
+
+    verdict = post(daemon, {"inputs": inputs(wait=True), "job": "need-checks"})
+
+    assert verdict["conclusion"] == "OK"
+    assert [check["name"] for check in verdict["checks"]] == ["test"]
+
+
+def test_serve_fails_on_unmet_requirements(mock_api: MockGhApi, ref: GitRef, daemon: server.Server):
+    checks = [CheckRunFactory.build(name="test", status="completed", conclusion="failure")]
+    mock_api.checks.list_for_ref(ref=ref["ref"]).paginated("check_runs", checks)
+
+    verdict = post(daemon, {"inputs": inputs(), "job": "need-checks"})
+
+    assert verdict["conclusion"] == "KO"
+    assert "test concluded with failure" in verdict["message"]
+
+
+def test_serve_ignores_the_waiting_job(mock_api: MockGhApi, ref: GitRef, daemon: server.Server):
+    checks = [CheckRunFactory.build(name="need-checks", status="in_progress", conclusion=None)]
+    mock_api.checks.list_for_ref(ref=ref["ref"]).paginated("check_runs", checks)
+
+    verdict = post(daemon, {"inputs": inputs(), "job": "need-checks"})
+
+    assert verdict["conclusion"] == "OK"
+
+
+def test_serve_reports_api_failures(mock_api: MockGhApi, ref: GitRef, daemon: server.Server):
+    mock_api.actions.list_workflow_runs(workflow_id="ci.yml", head_sha=ref["object"]["sha"]).error(
+        404
+    )
+
+    with pytest.raises(HTTPError) as excinfo:
+        post(daemon, {"inputs": inputs(workflow="ci.yml"), "job": "need-checks"})
+
+    assert excinfo.value.code == 502
+    assert "GitHub API failure" in json.loads(excinfo.value.read())["message"]
+
+
+def test_serve_fails_on_permanent_poll_failures(
+    mock_api: MockGhApi, ref: GitRef, daemon: server.Server
+):
+    mock_api.checks.list_for_ref(ref=ref["ref"], per_page=100, page=1).error(404)
+
+    with pytest.raises(HTTPError) as excinfo:
+        post(daemon, {"inputs": inputs(), "job": "need-checks"})
+
+    assert excinfo.value.code == 502
+    assert "Unable to poll owner/repo" in json.loads(excinfo.value.read())["message"]
+    assert not daemon.hub.commits
+
+
+def test_hub_retries_transient_poll_failures(mock_api: MockGhApi, ref: GitRef):
+    mock_api.api.retries = 0
+    mock_api.checks.list_for_ref(ref=ref["ref"], per_page=100, page=1).error(502)
+    hub = server.Hub(mock_api.api)
+    waiter = hub.subscribe(Inputs(**inputs()).target, Inputs(**inputs()), "job", Event())
+    (commit,) = hub.commits.values()
+
+    hub.poll(commit)
+
+    assert not waiter.done
+    assert waiter.error is None
+    assert commit.next_poll > 0
+
+
+def test_run_delegates_to_the_server(
+    mock_api: MockGhApi,
+    ctx: Context,
+    current_job: Job,
+    mock_workflow: MockWorkflow,
+    ref: GitRef,
+    daemon: server.Server,
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.server = daemon.url
+    jobs = JobFactory.batch(2, status="completed", conclusion="success")
+    mock_workflow(current_job, *jobs, ref=ref["ref"], current=True)
+
+    action.run(ctx)
+
+
+def test_run_delegated_failure(
+    mock_api: MockGhApi,
+    ctx: Context,
+    current_job: Job,
+    mock_workflow: MockWorkflow,
+    ref: GitRef,
+    daemon: server.Server,
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.server = daemon.url
+    jobs = JobFactory.batch(2, status="completed", conclusion="failure")
+    mock_workflow(current_job, *jobs, ref=ref["ref"], current=True)
+
+    with pytest.raises(RequirementsNotMet):
+        action.run(ctx)
+
+
+def test_run_delegated_keeps_the_webhook_secret(
+    mock_api: MockGhApi,
+    ctx: Context,
+    current_job: Job,
+    mock_workflow: MockWorkflow,
+    ref: GitRef,
+    daemon: server.Server,
+    mocker: MockerFixture,
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.server = daemon.url
+    ctx.inputs.wait_mode = "webhook"
+    ctx.inputs.webhook_secret = "topsecret"
+    jobs = JobFactory.batch(2, status="completed", conclusion="success")
+    mock_workflow(current_job, *jobs, ref=ref["ref"], current=True)
+    urlopen = mocker.spy(action, "urlopen")
+
+    action.run(ctx)
+
+    (request,), _ = urlopen.call_args
+    assert b"topsecret" not in request.data
+
+
+def test_run_with_unreachable_server(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow, ref: GitRef
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.server = "http://127.0.0.1:1"
+    mock_workflow(current_job, ref=ref["ref"], current=True)
+
+    with pytest.raises(ActionError, match="unreachable"):
+        action.run(ctx)
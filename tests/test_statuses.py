@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+
+from need_checks import statuses
+from tests.factories import CheckRunFactory, CommitStatusFactory
+
+
+@pytest.mark.parametrize(
+    "state,status,conclusion",
+    [
+        ("pending", "in_progress", None),
+        ("success", "completed", "success"),
+        ("failure", "completed", "failure"),
+        ("error", "completed", "failure"),
+    ],
+)
+def test_as_check_run(state: str, status: str, conclusion: str | None):
+    commit_status = CommitStatusFactory.build(state=state, context="jenkins")
+
+    check = statuses.as_check_run(commit_status)
+
+    assert check["id"] == commit_status["id"]
+    assert check["name"] == "jenkins"
+    assert check["status"] == status
+    assert check["conclusion"] == conclusion
+
+
+def test_merge_deduplicates_by_context():
+    checks = [CheckRunFactory.build(name="build"), CheckRunFactory.build(name="lint")]
+    commit_statuses = [
+        CommitStatusFactory.build(context="build"),
+        CommitStatusFactory.build(context="jenkins", state="pending"),
+        CommitStatusFactory.build(context="jenkins", state="success"),
+    ]
+
+    merged = list(statuses.merge(checks, lambda: commit_statuses))
+
+    assert [check["name"] for check in merged] == ["build", "lint", "jenkins"]
+    assert merged[-1]["status"] == "in_progress"
+
+
+def test_merge_fetches_statuses_last():
+    checks = iter([CheckRunFactory.build(name="build")])
+
+    def fail():
+        raise AssertionError("Statuses fetched too early")
+
+    assert next(statuses.merge(checks, fail))["name"] == "build"
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.error import HTTPError
+from urllib.request import Request
+
+import pytest
+
+from need_checks.transport import USER_AGENT, ConnectionPool
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: Server
+
+    def do_GET(self):
+        self.server.clients.append(self.client_address)
+        match self.path:
+            case "/missing":
+                self.respond(404, {"message": "Not Found"})
+            case "/moved":
+                self.send_response(301)
+                self.send_header("Location", "/ok")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            case "/hangup":
+                # Drop the connection without telling the client
+                self.respond(200, {"path": self.path})
+                self.close_connection = True
+            case _:
+                self.respond(200, {"path": self.path, "agent": self.headers["User-Agent"]})
+
+    def respond(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    clients: list[tuple[str, int]]
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+
+@pytest.fixture
+def server() -> Iterator[Server]:
+    server = Server(("127.0.0.1", 0), Handler)
+    server.clients = []
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool() -> Iterator[ConnectionPool]:
+    pool = ConnectionPool()
+    yield pool
+    pool.close()
+
+
+def get(pool: ConnectionPool, url: str) -> dict:
+    with pool.urlopen(Request(url), timeout=5) as response:
+        return json.loads(response.read())
+
+
+def test_reuse_connection(server: Server, pool: ConnectionPool):
+    for path in "/a", "/b", "/c":
+        assert get(pool, f"{server.url}{path}")["path"] == path
+
+    assert len(set(server.clients)) == 1
+
+
+def test_send_user_agent(server: Server, pool: ConnectionPool):
+    assert get(pool, f"{server.url}/")["agent"] == USER_AGENT
+
+
+def test_http_error(server: Server, pool: ConnectionPool):
+    with pytest.raises(HTTPError) as excinfo:
+        get(pool, f"{server.url}/missing")
+
+    assert excinfo.value.code == 404
+    assert json.loads(excinfo.value.read()) == {"message": "Not Found"}
+    # Connection is still reusable
+    get(pool, f"{server.url}/")
+    assert len(set(server.clients)) == 1
+
+
+def test_follow_redirect(server: Server, pool: ConnectionPool):
+    assert get(pool, f"{server.url}/moved")["path"] == "/ok"
+
+
+def test_retry_on_stale_connection(server: Server, pool: ConnectionPool):
+    get(pool, f"{server.url}/hangup")
+
+    assert get(pool, f"{server.url}/")["path"] == "/"
+    assert len(set(server.clients)) == 2
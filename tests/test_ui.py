@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from typing import get_args
+from typing import TYPE_CHECKING, get_args
 
 import pytest
 
 from need_checks import types, ui
 from tests.factories import GitRefFactory
 
+if TYPE_CHECKING:
+    from need_checks.context import Context
+
 
 @pytest.mark.parametrize(
     "ref,expected",
@@ -26,3 +29,15 @@ def test_ref_type(ref: str, expected: str):
 @pytest.mark.parametrize("conclusion", get_args(types.Conclusion.__value__))  # type: ignore[attr-defined]
 def test_conclusion_icon(conclusion: str):
     assert ui.conclusion_icon(conclusion)
+
+
+def test_display_inputs_masks_secrets(ctx: Context, capsys: pytest.CaptureFixture[str]):
+    ctx.inputs.token = "ghp_abcdefgh"
+    ctx.inputs.webhook_secret = "s3cr3t-hmac-key"
+
+    ui.display_inputs("Inputs", ctx)
+
+    out = capsys.readouterr().out
+    assert "ghp**********fgh" in out
+    assert "s3c" not in out
+    assert "key" not in out
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from threading import Thread
+from typing import TYPE_CHECKING
+from urllib.error import HTTPError
+
+import pytest
+
+from need_checks import action, records, webhook
+from need_checks.types import CheckRun
+from tests.factories import CheckRunFactory, GitRefFactory, JobFactory
+
+if TYPE_CHECKING:
+    from need_checks.context import Context
+    from need_checks.types import Job
+    from tests.conftest import MockGhApi, MockWorkflow
+
+SHA = "a" * 40
+SECRET = "s3cr3t"
+
+
+def check_run(status: str = "completed", sha: str = SHA, suite: int = 1, **kwargs) -> CheckRun:
+    kwargs.setdefault("conclusion", "success" if status == "completed" else None)
+    return CheckRunFactory.build(
+        status=status,
+        head_sha=sha,
+        check_suite={"id": suite},
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def table() -> webhook.CheckTable:
+    return webhook.CheckTable({SHA: None})
+
+
+@pytest.fixture
+def receiver(table: webhook.CheckTable) -> Iterator[webhook.Receiver]:
+    receiver = webhook.Receiver(("127.0.0.1", 0), table, SECRET)
+    thread = Thread(target=receiver.serve_forever, daemon=True)
+    thread.start()
+    yield receiver
+    receiver.shutdown()
+    receiver.server_close()
+
+
+def test_verify_signature():
+    body = b'{"action": "completed"}'
+    signature = webhook.sign(SECRET, body)
+
+    assert signature.startswith("sha256=")
+    assert webhook.verify_signature(SECRET, body, signature)
+    assert not webhook.verify_signature(SECRET, body + b" ", signature)
+    assert not webhook.verify_signature(SECRET, body, None)
+    assert webhook.verify_signature("", body, None)
+
+
+def test_table_applies_check_run_events(table: webhook.CheckTable):
+    running = check_run("in_progress")
+    version = table.reset(SHA, [running])
+
+    table.apply("check_run", {"check_run": {**running, "status": "completed"}})
+
+    assert table.wait(version, 0)
+    assert [check["status"] for check in table.snapshot(SHA) or []] == ["completed"]
+
+
+def test_table_keeps_the_latest_run_of_a_check(table: webhook.CheckTable):
+    failed = check_run(id=1, name="test", conclusion="failure")
+    rerun = check_run("in_progress", id=2, name="test")
+    version = table.reset(SHA, [failed, check_run(id=3, name="lint")])
+
+    table.apply("check_run", {"check_run": rerun})
+    table.apply("check_run", {"check_run": {**failed, "status": "completed"}})  # Late event
+
+    assert table.wait(version, 0)
+    assert sorted((check["id"], check["status"]) for check in table.snapshot(SHA) or []) == [
+        (2, "in_progress"),
+        (3, "completed"),
+    ]
+
+
+def test_table_ignores_other_commits(table: webhook.CheckTable):
+    version = table.reset(SHA, [])
+
+    table.apply("check_run", {"check_run": check_run(sha="b" * 40)})
+
+    assert not table.wait(version, 0)
+
+
+def test_table_ignores_other_suites():
+    table = webhook.CheckTable({SHA: 1})
+    version = table.reset(SHA, [])
+
+    table.apply("check_run", {"check_run": check_run(suite=2)})
+
+    assert not table.wait(version, 0)
+
+
+def test_table_refetch_on_check_suite_event(table: webhook.CheckTable):
+    version = table.reset(SHA, [check_run("in_progress")])
+
+    table.apply("check_suite", {"check_suite": {"id": 1, "head_sha": SHA}})
+
+    assert table.wait(version, 0)
+    assert table.snapshot(SHA) is None
+
+
+def test_table_refetch_on_status_event(table: webhook.CheckTable):
+    version = table.reset(SHA, [check_run("in_progress")])
+
+    table.apply("status", {"sha": SHA, "context": "jenkins", "state": "success"})
+
+    assert table.wait(version, 0)
+    assert table.snapshot(SHA) is None
+
+
+def test_receive_signed_events(receiver: webhook.Receiver, table: webhook.CheckTable):
+    version = table.reset(SHA, [])
+    check = check_run()
+
+    status = webhook.send(receiver.url, "check_run", {"check_run": check}, SECRET)
+
+    assert status == 204
+    assert table.wait(version, 5)
+    assert table.snapshot(SHA) == [records.compact(check)]
+
+
+def test_reject_invalid_signature(receiver: webhook.Receiver, table: webhook.CheckTable):
+    with pytest.raises(HTTPError) as excinfo:
+        webhook.send(receiver.url, "check_run", {"check_run": check_run()}, "wrong")
+
+    assert excinfo.value.code == 401
+    assert table.version == 0
+
+
+def test_run_wakes_up_on_events(
+    mock_api: MockGhApi, ctx: Context, current_job: Job, mock_workflow: MockWorkflow
+):
+    ctx.inputs.repository = "owner/repo"
+    ctx.inputs.ref = "main"
+    ctx.inputs.wait = True
+    ctx.inputs.wait_mode = "webhook"
+    ctx.inputs.webhook_secret = SECRET
+    ctx.inputs.webhook_port = 0
+    ref = GitRefFactory.build(ref="refs/heads/main")
+    mock_api.git.get_ref(ref="main").returns(ref)
+    mock_api.git.get_ref(ref="tags/main").error(404)
+    mock_api.git.get_ref(ref="heads/main").error(404)
+    jobs = JobFactory.batch(2, status="in_progress", conclusion=None)
+    mock_workflow(current_job, *jobs, ref=ref["ref"], current=True)
+    wait = webhook.CheckTable.wait
+
+    def deliver(table: webhook.CheckTable, version: int, timeout: float):
+        sha = ref["object"]["sha"]
+        for check in table.snapshot(sha) or []:
+            completed = {**check, "status": "completed", "conclusion": "success"}
+            table.apply("check_run", {"check_run": {**completed, "head_sha": sha}})
+        return wait(table, version, timeout)
+
+    mock_api.mocker.patch.object(webhook.CheckTable, "wait", autospec=True, side_effect=deliver)
+
+    action.run(ctx)
+
+    assert (
+        len(
+            mock_api.calls[
+                mock_api.checks.list_for_ref(ref=ref["ref"], per_page=100, page=1).endpoint
+            ]
+        )
+        == 1
+    )
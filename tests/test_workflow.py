@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import pytest
+import strictyaml
+
+from need_checks import workflow
+
+WORKFLOW = """\
+---
+# Comments are ignored
+name: "CI"  # Even after a value
+
+on:
+  push:
+    branches:
+      - main
+
+jobs:
+  lint:
+    name: Lint
+    runs-on: ubuntu-latest
+    steps:
+      - name: Checkout
+        uses: actions/checkout@v4
+      - name: Lint
+        run: |
+          name: not a job name
+          pdm lint
+
+  'test':
+    runs-on: ${{ matrix.os }}
+    strategy:
+      matrix:
+        os:
+          - ubuntu-latest
+          - windows-latest
+    name: 'Test (${{ matrix.os }}) ''quoted'''
+    env:
+      name: not a job name either
+
+  "need-checks":
+    needs: lint
+    name: Need checks # Inline comment
+    steps:
+      - uses: need-checks@v1
+"""
+
+
+def generate(jobs: int) -> str:
+    lines = ["name: Generated", "on: push", "jobs:"]
+    for index in range(jobs):
+        lines += [
+            f"  job-{index}:",
+            f"    name: Job {index}",
+            "    runs-on: ubuntu-latest",
+            "    steps:",
+            *(f"      - name: Step {step}\n        run: echo {step}" for step in range(5)),
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def names(parsed: dict) -> dict:
+    return {
+        "name": parsed.get("name"),
+        "jobs": {job: jobdef.get("name") for job, jobdef in parsed["jobs"].items()},
+    }
+
+
+@pytest.mark.parametrize("content", [WORKFLOW, generate(100)], ids=["sample", "generated"])
+def test_scan_matches_strictyaml(content: str):
+    assert names(workflow.scan(content)) == names(strictyaml.load(content).data)
+
+
+def test_scan():
+    assert workflow.scan(WORKFLOW) == {
+        "name": "CI",
+        "jobs": {
+            "lint": {"name": "Lint"},
+            "test": {"name": "Test (${{ matrix.os }}) 'quoted'"},
+            "need-checks": {"name": "Need checks"},
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "jobs:\n  build:\n    name: >\n      Folded\n",
+        "jobs:\n  build:\n    name: &name Anchored\n",
+        "jobs:\n  build:\n    name: Multi\n      line\n",
+        "jobs:\n  build:\n    name:\n      Next line\n",
+        'jobs:\n  build:\n    name: "Escaped \\" quote"\n',
+        "jobs: {build: {name: Flow}}\n",
+        "jobs:\n  build: {name: Flow}\n",
+        "jobs:\n\tbuild:\n\t\tname: Tabs\n",
+        "name: first\n---\nname: second\n",
+        "- not a mapping\n",
+    ],
+)
+def test_scan_unsupported(content: str):
+    with pytest.raises(workflow.Unsupported):
+        workflow.scan(content)
+
+
+def test_scan_with_byte_order_mark():
+    content = "\ufeffname: CI\njobs:\n  build:\n    name: Build\n"
+
+    assert workflow.scan(content) == {"name": "CI", "jobs": {"build": {"name": "Build"}}}
+    assert workflow.parse(content) == workflow.scan(content)
+
+
+def test_scan_ignores_flow_collections_outside_names():
+    # Rejected by strictyaml, yet common in workflows
+    content = (
+        "on:\n  push:\n    branches: [main]\njobs:\n  build:\n    needs: [lint]\n    name: Build\n"
+    )
+
+    assert workflow.scan(content) == {"jobs": {"build": {"name": "Build"}}}
+
+
+def test_parse_falls_back_to_strictyaml():
+    content = "jobs:\n  build:\n    name: >\n      Folded\n      name\n"
+
+    assert workflow.parse(content) == {"jobs": {"build": {"name": "Folded name\n"}}}